@@ -1,11 +1,337 @@
+import asyncio
+import io
+import json
+import mmap
 import os
 import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import sys
+import time
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from httputil import (  # noqa: E402
+    PageCache,
+    choose_encoding,
+    etag_for,
+    is_not_modified,
+    parse_range,
+)
+from markdown_blocks import markdown_to_html_chunks  # noqa: E402
+from preview import PreviewServer  # noqa: E402
+from search_index import SEARCH_DIR, SearchIndex  # noqa: E402
+from watch import RELOAD_STAMP  # noqa: E402
+
+LIVERELOAD_PATH = "/__livereload"
+SEARCH_PATH = "/search"
+LIVERELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVERELOAD_PATH}").onmessage = '
+    "() => location.reload();</script>"
+).encode()
+
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler for the built site: HTTP/1.1 keep-alive, ETag and
+    Last-Modified validators with 304 responses, precompressed .gz
+    siblings for clients that accept gzip, and small files served from a
+    shared PageCache.
+    Files too big for the cache go from disk to the socket with sendfile,
+    or from a memory map where sendfile is missing. Single byte ranges
+    are answered with 206 Partial Content.
+    With livereload set, HTML pages get a script that listens on
+    LIVERELOAD_PATH, where an event is sent whenever `main.py --watch`
+    touches the reload stamp in the served directory.
+    With render_markdown set, .md files are rendered while they are sent,
+    as a chunked HTML response.
+    With a search_index, SEARCH_PATH?q=<query>[&limit=<n>] answers with
+    the matching pages as JSON.
+    """
+
+    protocol_version = "HTTP/1.1"
+    page_cache = PageCache()
+    # HTML is always revalidated, everything else may be reused for max_age.
+    max_age = 3600
+    livereload = False
+    render_markdown = False
+    search_index = None
+    # Rendered fragments are gathered up to this size per HTTP chunk.
+    stream_chunk_size = 16 * 1024
+
+    def do_GET(self):
+        if self.livereload and self.path == LIVERELOAD_PATH:
+            self._send_reload_events()
+            return
+        if self.search_index is not None:
+            url = urlsplit(self.path)
+            if url.path == SEARCH_PATH:
+                self._send_search_results(parse_qs(url.query))
+                return
+        super().do_GET()
+
+    def send_head(self):
+        # (offset, count) of the body to send; None leaves copying to the
+        # base class, e.g. for directory listings.
+        self._body_range = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return super().send_head()
+            for index in ("index.html", "index.htm"):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return super().send_head()
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        if self.render_markdown and path.endswith(".md"):
+            return self._send_markdown_head(path)
+
+        content_type = self.guess_type(path)
+        inject_reload = self.livereload and content_type.startswith("text/html")
+        body_path, body_stat, encoding = path, stat, None
+        if not inject_reload:
+            gz_path = path + ".gz"
+            gz_stat = _stat(gz_path)
+            encoding = choose_encoding(
+                self.headers.get("Accept-Encoding"),
+                stat.st_mtime_ns,
+                gz_stat.st_mtime_ns if gz_stat is not None else None,
+            )
+            if encoding:
+                body_path, body_stat = gz_path, gz_stat
+
+        etag = etag_for(stat, gzip=bool(encoding))
+        if is_not_modified(
+            self.headers.get("If-None-Match"),
+            self.headers.get("If-Modified-Since"),
+            etag,
+            stat.st_mtime,
+        ):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_validators(etag, stat, content_type)
+            self.end_headers()
+            return None
+
+        body = self.page_cache.get(body_path, body_stat)
+        if inject_reload:
+            if body is None:
+                with open(body_path, "rb") as f:
+                    body = f.read()
+            body = _inject_before_body_end(body, LIVERELOAD_SCRIPT)
+        if body is None:
+            f = open(body_path, "rb")
+            length = os.fstat(f.fileno()).st_size
+        else:
+            f = io.BytesIO(body)
+            length = len(body)
+
+        byte_range = self._requested_range(etag, stat, length)
+        if byte_range is None:
+            self._body_range = (0, length)
+            self.send_response(HTTPStatus.OK)
+        elif byte_range is False:
+            f.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{length}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        else:
+            start, end = byte_range
+            self._body_range = (start, end - start + 1)
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{length}")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(self._body_range[1]))
+        self.send_header("Accept-Ranges", "bytes")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self._send_validators(etag, stat, content_type)
+        self.end_headers()
+        return f
+
+    def copyfile(self, source, outputfile):
+        if isinstance(source, _RenderedMarkdown):
+            self._write_chunked(source, outputfile)
+            return
+        if self._body_range is None:
+            return super().copyfile(source, outputfile)
+        offset, count = self._body_range
+        if count == 0:
+            return
+        if isinstance(source, io.BytesIO):
+            with source.getbuffer() as view:
+                outputfile.write(view[offset : offset + count])
+            return
+        if hasattr(os, "sendfile"):
+            self.connection.sendfile(source, offset, count)
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                outputfile.write(view[offset : offset + count])
+
+    def _requested_range(self, etag, stat, length):
+        """
+        The range to send, as parse_range returns it; a Range for a
+        version other than the one If-Range names gets the whole body.
+        """
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range.strip() not in (
+            etag,
+            self.date_time_string(stat.st_mtime),
+        ):
+            return None
+        return parse_range(self.headers.get("Range"), length)
+
+    def _send_markdown_head(self, path):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return _RenderedMarkdown(path)
+
+    def _write_chunked(self, source, outputfile):
+        buffered = []
+        size = 0
+        try:
+            for fragment in source:
+                data = fragment.encode("utf-8")
+                buffered.append(data)
+                size += len(data)
+                if size >= self.stream_chunk_size:
+                    _write_chunk(outputfile, b"".join(buffered))
+                    buffered.clear()
+                    size = 0
+        except Exception:
+            # The status line is already out, so the only way left to signal
+            # the failure is to end the response without its last chunk.
+            self.close_connection = True
+            self.log_error("Failed to render %s", source.path)
+            return
+        if self.livereload:
+            buffered.append(LIVERELOAD_SCRIPT)
+        if buffered:
+            _write_chunk(outputfile, b"".join(buffered))
+        outputfile.write(b"0\r\n\r\n")
+
+    def _send_reload_events(self):
+        # A server-sent event stream; it has no length, so the connection
+        # is closed when the client goes away.
+        self.close_connection = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        stamp = os.path.join(self.directory, RELOAD_STAMP)
+        last = _mtime_ns(stamp)
+        idle = 0.0
+        try:
+            while True:
+                time.sleep(0.25)
+                current = _mtime_ns(stamp)
+                if current != last:
+                    last = current
+                    self.wfile.write(b"data: reload\n\n")
+                    idle = 0.0
+                elif idle >= 15:
+                    # Comment line, keeps proxies from timing the stream out.
+                    self.wfile.write(b": ping\n\n")
+                    idle = 0.0
+                else:
+                    idle += 0.25
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_search_results(self, params):
+        start = time.perf_counter()
+        query = params.get("q", [""])[0]
+        try:
+            limit = max(1, min(int(params.get("limit", ["10"])[0]), 100))
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST, "limit must be a number")
+            return
+        results = self.search_index.search(query, limit)
+        body = json.dumps(
+            {
+                "query": query,
+                "results": results,
+                "took_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+        ).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_validators(self, etag, stat, content_type):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
+        self.send_header("Vary", "Accept-Encoding")
+        if content_type.startswith("text/html"):
+            self.send_header("Cache-Control", "no-cache")
+        else:
+            self.send_header("Cache-Control", f"public, max-age={self.max_age}")
+
+
+class _RenderedMarkdown:
+    """
+    Body of a streamed .md page; the file is opened and rendered only as
+    the fragments are iterated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __iter__(self):
+        self._file = open(self.path, encoding="utf-8")
+        return markdown_to_html_chunks(self._file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _write_chunk(outputfile, data):
+    outputfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _inject_before_body_end(html, snippet):
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + snippet
+    return html[:index] + snippet + html[index:]
 
 
 def run(
-    server_class=HTTPServer,
-    handler_class=SimpleHTTPRequestHandler,
+    server_class=ThreadingHTTPServer,
+    handler_class=SiteRequestHandler,
     port=8888,
     directory=None,
 ):
@@ -23,6 +349,64 @@ if __name__ == "__main__":
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--livereload",
+        action="store_true",
+        help="Reload open pages when `main.py --watch` rebuilds the site",
+    )
+    parser.add_argument(
+        "--render-md",
+        action="store_true",
+        help="Render .md files to HTML while streaming them",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=f"Answer {SEARCH_PATH}?q=... from the index `main.py --search` wrote",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Serve --dir as markdown sources, rendering .md files on request"
+        " with asyncio and a process pool instead of serving a built site",
+    )
+    parser.add_argument(
+        "--template",
+        type=str,
+        help="With --preview, render pages into this HTML template",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="With --preview, processes rendering pages (default: one per CPU)",
+        default=None,
+    )
+    parser.add_argument(
+        "--single-threaded",
+        action="store_true",
+        help="Serve one request at a time with the plain SimpleHTTPRequestHandler",
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
\ No newline at end of file
+    if args.preview:
+        template = None
+        if args.template is not None:
+            with open(args.template, encoding="utf-8") as f:
+                template = f.read()
+        preview = PreviewServer(args.dir, template=template, workers=args.workers)
+        print(f"Previewing '{args.dir}' on http://localhost:{args.port}...")
+        try:
+            asyncio.run(preview.serve(port=args.port))
+        except KeyboardInterrupt:
+            pass
+    elif args.single_threaded:
+        run(HTTPServer, SimpleHTTPRequestHandler, port=args.port, directory=args.dir)
+    else:
+        SiteRequestHandler.livereload = args.livereload
+        SiteRequestHandler.render_markdown = args.render_md
+        if args.search:
+            SiteRequestHandler.search_index = SearchIndex(
+                os.path.join(os.path.abspath(args.dir), SEARCH_DIR)
+            )
+        run(port=args.port, directory=args.dir)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+from array import array
+
+from block_cache import BlockCache, parser_version
+from markdown_blocks import BlockType, ParsedBlock, parse_markdown
+from profiling import count, stage
+from textnode import TextNode, TextType, walk_nodes
+
+# Bump when the encoding below changes.
+AST_FORMAT = 2
+
+# An encoded document is a header, the length in characters of every
+# string in the string table, the document itself as unsigned 16- or
+# 32-bit ints, and the UTF-8 of all strings back to back. The ints are
+#
+#   block count, then per block: type code, level, segment count,
+#   then per segment: node count, then per node: type code, text, url,
+#   child count, followed by its children encoded the same way
+#
+# where text and url index the string table and an index equal to the
+# string count stands for a None url. Type codes are positions in
+# BlockType and TextType.
+_MAGIC = b"MAST"
+_HEADER = struct.Struct("<4sBBHIII")
+_U32 = "I" if array("I").itemsize == 4 else "L"
+# Array typecode by item width; documents whose ints all fit in two bytes
+# are stored with two bytes per int.
+_TYPECODES = {2: "H", 4: _U32}
+_NATIVE_ORDER = 0 if sys.byteorder == "little" else 1
+
+_BLOCK_TYPES = list(BlockType)
+_TEXT_TYPES = list(TextType)
+_BLOCK_CODES = {block_type: code for code, block_type in enumerate(_BLOCK_TYPES)}
+_TEXT_CODES = {text_type: code for code, text_type in enumerate(_TEXT_TYPES)}
+
+
+def encode_blocks(blocks: list[ParsedBlock]) -> bytes:
+    strings: dict[str, int] = {}
+    ints = array(_U32, [len(blocks)])
+    add = ints.append
+    # Every url is known once the loop is done; None is fixed up after.
+    none_refs = []
+    for parsed in blocks:
+        add(_BLOCK_CODES[parsed.block_type])
+        add(parsed.level)
+        add(len(parsed.segments))
+        for segment in parsed.segments:
+            _encode_nodes(segment, ints, strings, none_refs)
+    for i in none_refs:
+        ints[i] = len(strings)
+    if max(ints) < 1 << 16:
+        ints = array("H", ints)
+    lengths = array(_U32, [len(string) for string in strings])
+    blob = "".join(strings).encode("utf-8")
+    header = _HEADER.pack(
+        _MAGIC,
+        AST_FORMAT,
+        _NATIVE_ORDER,
+        ints.itemsize,
+        len(strings),
+        len(ints),
+        len(blob),
+    )
+    return header + lengths.tobytes() + ints.tobytes() + blob
+
+
+def _encode_nodes(
+    nodes: list[TextNode], ints: array, strings: dict[str, int], none_refs: list[int]
+) -> None:
+    add = ints.append
+    add(len(nodes))
+    # walk_nodes order is the encoded order: each node with its child
+    # count, then its children.
+    for node in walk_nodes(nodes):
+        add(_TEXT_CODES[node.text_type])
+        add(strings.setdefault(node.text, len(strings)))
+        if node.url is None:
+            none_refs.append(len(ints))
+            add(0)
+        else:
+            add(strings.setdefault(node.url, len(strings)))
+        add(len(node.children) if node.children else 0)
+
+
+def decode_blocks(data: bytes) -> list[ParsedBlock]:
+    """
+    Decode what encode_blocks wrote. The string table is decoded from
+    UTF-8 in one go, and each distinct string becomes one str shared by
+    every node that uses it.
+    """
+    magic, version, order, width, string_count, int_count, blob_size = (
+        _HEADER.unpack_from(data, 0)
+    )
+    if magic != _MAGIC or version != AST_FORMAT:
+        raise ValueError("Not an encoded document of this format")
+    view = memoryview(data)
+    offset = _HEADER.size
+    lengths = array(_U32)
+    lengths.frombytes(view[offset : offset + 4 * string_count])
+    offset += 4 * string_count
+    ints = array(_TYPECODES[width])
+    ints.frombytes(view[offset : offset + width * int_count])
+    offset += width * int_count
+    if order != _NATIVE_ORDER:
+        lengths.byteswap()
+        ints.byteswap()
+    text = str(view[offset : offset + blob_size], "utf-8")
+
+    strings: list[str | None] = []
+    start = 0
+    for length in lengths:
+        strings.append(text[start : start + length])
+        start += length
+    strings.append(None)
+
+    values = ints.tolist()
+    pos = 1
+    blocks = []
+    for _ in range(values[0]):
+        block_type, level, segment_count = values[pos : pos + 3]
+        pos += 3
+        segments = []
+        for _ in range(segment_count):
+            nodes, pos = _decode_nodes(values, pos, strings)
+            segments.append(nodes)
+        blocks.append(ParsedBlock(_BLOCK_TYPES[block_type], level, segments))
+    return blocks
+
+
+def _decode_nodes(
+    values: list[int], pos: int, strings: list[str | None]
+) -> tuple[list[TextNode], int]:
+    text_types = _TEXT_TYPES
+    nodes: list[TextNode] = []
+    # [nodes still to decode at this level, the list they go in]
+    stack = [[values[pos], nodes]]
+    pos += 1
+    while stack:
+        level = stack[-1]
+        if not level[0]:
+            stack.pop()
+            continue
+        level[0] -= 1
+        text_type, text, url, child_count = values[pos : pos + 4]
+        pos += 4
+        node = TextNode(strings[text], text_types[text_type], strings[url])
+        level[1].append(node)
+        if child_count:
+            node.children = []
+            stack.append([child_count, node.children])
+    return nodes, pos
+
+
+class ASTCache(BlockCache):
+    """
+    On-disk cache from a whole markdown document to its parsed blocks,
+    stored with encode_blocks. Versioning, eviction and the layout of
+    entries are those of BlockCache, with AST_FORMAT added to the
+    version. An entry that fails to decode counts as a miss and is
+    dropped.
+    """
+
+    suffix = ".ast"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        version: str = None,
+    ) -> None:
+        if version is None:
+            version = parser_version()
+        super().__init__(directory, max_bytes, f"{version} ast {AST_FORMAT}")
+
+    def get(self, markdown: str) -> list[ParsedBlock] | None:
+        data = self._read_entry(markdown)
+        if data is None:
+            return None
+        try:
+            return decode_blocks(data)
+        except (ValueError, IndexError, KeyError, struct.error):
+            pass
+        self.hits -= 1
+        self.misses += 1
+        try:
+            os.remove(self._path(markdown))
+        except FileNotFoundError:
+            pass
+        else:
+            self._size -= len(data)
+        return None
+
+    def put(self, markdown: str, blocks: list[ParsedBlock]) -> None:
+        self._write_entry(markdown, encode_blocks(blocks))
+
+    def parse(self, markdown: str) -> list[ParsedBlock]:
+        """
+        The parsed blocks of markdown, parsing and storing them on a miss.
+        Reading and writing the cache are profiled as stages of their own.
+        """
+        with stage("ast_cache load"):
+            blocks = self.get(markdown)
+        if blocks is None:
+            blocks = parse_markdown(markdown)
+            with stage("ast_cache store"):
+                self.put(markdown, blocks)
+        else:
+            count("blocks", len(blocks))
+        return blocks
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import namedtuple
+
+from gencontent import generate_pages
+from inline_markdown import MarkdownSyntaxError
+from markdown_blocks import block_to_html, markdown_to_blocks
+
+REPORT_FORMAT = 1
+CHECKPOINT_FORMAT = 1
+
+# A page that failed to convert. line and column are 1-based positions in
+# the source, or None when the error can't be pinned to one (say, a
+# missing file).
+DocumentError = namedtuple(
+    "DocumentError", ["source", "dest", "line", "column", "error", "message"]
+)
+
+# Sources of the pages a batch wrote, the ones a checkpoint said were
+# already done, and the DocumentErrors of those that failed.
+BatchResult = namedtuple("BatchResult", ["built", "skipped", "errors"])
+
+
+def run_batch(
+    pages: list[tuple[str, str]],
+    checkpoint_path: str = None,
+    report_path: str = None,
+    **options,
+) -> BatchResult:
+    """
+    Convert the (from_path, dest_path) pairs, carrying on past pages that
+    fail; see generate_pages for the options.
+
+    With a checkpoint_path, every finished page is appended to that file
+    as soon as it is written, so a batch that is interrupted can be run
+    again and skip the pages already done whose source has not changed
+    since. Failed pages are always tried again. The checkpoint is removed
+    once a batch finishes without errors.
+    With a report_path, a JSON report of the batch and its errors is
+    written there.
+    """
+    done = {}
+    checkpoint = None
+    if checkpoint_path is not None:
+        key = _checkpoint_key(options)
+        done = load_checkpoint(checkpoint_path, key)
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+        if not done:
+            checkpoint.truncate(0)
+            _append(checkpoint, {"format": CHECKPOINT_FORMAT, "build": key})
+
+    to_build = []
+    skipped = []
+    # Taken before a page is read, so an edit made while it is being built
+    # doesn't get recorded as done.
+    stats = {}
+    for page in pages:
+        stat = _stat(page[0])
+        if _is_done(page, stat, done.get(page[0])):
+            skipped.append(page[0])
+        else:
+            to_build.append(page)
+            stats[page[0]] = stat
+
+    built = []
+    errors = []
+
+    def on_page(page: tuple[str, str], error: DocumentError | None) -> None:
+        if error is not None:
+            errors.append(error)
+            return
+        built.append(page[0])
+        stat = stats[page[0]]
+        if checkpoint is not None and stat is not None:
+            _append(
+                checkpoint,
+                {
+                    "source": page[0],
+                    "dest": page[1],
+                    "size": stat[0],
+                    "mtime_ns": stat[1],
+                },
+            )
+
+    try:
+        generate_pages(to_build, keep_going=True, on_page=on_page, **options)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    if checkpoint_path is not None and not errors:
+        os.remove(checkpoint_path)
+    result = BatchResult(built, skipped, errors)
+    if report_path is not None:
+        write_report(report_path, result)
+    return result
+
+
+def load_checkpoint(path: str, key: str) -> dict[str, dict]:
+    """
+    The entries of the pages recorded in the checkpoint at path by
+    source, or none if it is missing or was written by a build with other
+    options. A last line cut short by an interruption is ignored.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return {}
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return {}
+    if header.get("format") != CHECKPOINT_FORMAT or header.get("build") != key:
+        return {}
+    entries = {}
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        entries[entry["source"]] = entry
+    return entries
+
+
+def document_error(from_path: str, dest_path: str, error: Exception) -> DocumentError:
+    """Describe an error raised while converting from_path."""
+    line = column = None
+    try:
+        with open(from_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = None
+    if data is not None:
+        line, column = locate_error(data, error)
+    message = str(error) or type(error).__name__
+    return DocumentError(
+        from_path, dest_path, line, column, type(error).__name__, message
+    )
+
+
+def locate_error(data: bytes, error: Exception) -> tuple[int | None, int | None]:
+    """
+    The line and column in the source data where error comes from. An
+    undecodable byte and a MarkdownSyntaxError are located exactly; any
+    other error is put at the start of the first block that fails to
+    render on its own.
+
+    Only the legacy split_nodes_* parser (text_to_textnodes with
+    single_pass=False) raises MarkdownSyntaxError. scan_inline, which
+    builds use by default, leaves unclosed delimiters as text.
+    """
+    if isinstance(error, UnicodeDecodeError):
+        return _line_and_column(data, error.start, b"\n")
+    markdown = data.decode("utf-8", errors="replace")
+    if isinstance(error, MarkdownSyntaxError):
+        # Reached only when the legacy parser is installed through
+        # set_inline_functions.
+        # Inline text is the text of its block with lines joined by
+        # spaces, so offsets into it carry over to the source.
+        found = markdown.replace("\n", " ").find(error.text)
+        if found != -1:
+            return _line_and_column(markdown, found + error.offset, "\n")
+    pos = 0
+    for block in markdown_to_blocks(markdown):
+        pos = markdown.find(block, pos)
+        try:
+            block_to_html(block)
+        except Exception:
+            return _line_and_column(markdown, pos, "\n")
+        pos += len(block)
+    return None, None
+
+
+def _line_and_column(
+    text: str | bytes, offset: int, newline: str | bytes
+) -> tuple[int, int]:
+    line_start = text.rfind(newline, 0, offset) + 1
+    return text.count(newline, 0, offset) + 1, offset - line_start + 1
+
+
+def write_report(path: str, result: BatchResult) -> None:
+    report = {
+        "format": REPORT_FORMAT,
+        "built": len(result.built),
+        "skipped": len(result.skipped),
+        "failed": len(result.errors),
+        "errors": [error._asdict() for error in result.errors],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def format_error(error: DocumentError) -> str:
+    """The error as a path:line:column: message line, like a compiler's."""
+    location = error.source
+    if error.line is not None:
+        location += f":{error.line}:{error.column}"
+    return f"{location}: {error.error}: {error.message}"
+
+
+def _checkpoint_key(options: dict) -> str:
+    # Only what changes the pages written; the caches don't.
+    from sitebuild import build_key
+
+    return build_key(options.get("template"), options.get("gzip_output", False))
+
+
+def _stat(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _is_done(
+    page: tuple[str, str], stat: tuple[int, int] | None, entry: dict | None
+) -> bool:
+    return (
+        entry is not None
+        and stat is not None
+        and entry["dest"] == page[1]
+        and (entry["size"], entry["mtime_ns"]) == stat
+        and os.path.exists(page[1])
+    )
+
+
+def _append(checkpoint, entry: dict) -> None:
+    # One line per page, flushed right away so an interrupted batch loses
+    # at most the page it was writing.
+    checkpoint.write(json.dumps(entry) + "\n")
+    checkpoint.flush()
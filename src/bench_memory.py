@@ -0,0 +1,83 @@
+"""
+Bytes per node for TextNode, LeafNode and ParentNode, measured with
+tracemalloc. The "dict" rows are unslotted copies of the classes, i.e. the
+layout before __slots__ was added.
+
+    python3 src/bench_memory.py [count]
+"""
+
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, text_type_bold
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None, children=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+        self.children = children
+
+
+class DictLeafNode:
+    def __init__(self, value, tag=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, children, tag=None, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+
+def bytes_per_node(factory, count: int) -> float:
+    # Shared arguments so only the node objects themselves are counted.
+    text = "shared text"
+    children = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(text, children) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the list holding the nodes.
+    return (after - before - sys.getsizeof(nodes)) / len(nodes)
+
+
+CASES = [
+    (
+        "TextNode",
+        lambda t, c: DictTextNode(t, text_type_bold),
+        lambda t, c: TextNode(t, text_type_bold),
+    ),
+    (
+        "LeafNode",
+        lambda t, c: DictLeafNode(t, "b"),
+        lambda t, c: LeafNode(t, "b"),
+    ),
+    (
+        "ParentNode",
+        lambda t, c: DictParentNode(c, "p"),
+        lambda t, c: ParentNode(c, "p"),
+    ),
+]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'class':<12}{'dict':>10}{'slots':>10}")
+    for name, before, after in CASES:
+        print(
+            f"{name:<12}{bytes_per_node(before, count):>10.1f}"
+            f"{bytes_per_node(after, count):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Times each stage of the markdown -> HTML pipeline on synthetic corpora.
+
+    python3 src/bench_pipeline.py [--corpus NAME] [--scale N] [--repeat N] [--json]
+
+Every stage is timed separately, best of --repeat runs, and reported as
+seconds and MB/s of markdown input. A second, untimed run under
+tracemalloc gives the peak bytes and the number of allocations the stage
+left alive, i.e. roughly the objects making up its output. Peak RSS is
+for the whole process.
+With --json the results are printed as one JSON document so runs can be
+diffed between versions.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from htmlnode import HTMLNode, ParentNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_blocks
+from textnode import text_node_to_html_node
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def short_paragraphs(scale: int) -> str:
+    return "\n\n".join(
+        f"Paragraph {i} is short and plain." for i in range(2000 * scale)
+    )
+
+
+def heavy_inline(scale: int) -> str:
+    line = (
+        "Some **bold** and *italic* text with `code`, an "
+        "![image](https://www.example.com/img.png) and a "
+        "[link](https://www.example.com) in it."
+    )
+    return "\n\n".join("\n".join([line] * 4) for _ in range(500 * scale))
+
+
+def huge_block(scale: int) -> str:
+    return " ".join(
+        f"word{i} **bold{i}** *it{i}*" if i % 10 == 0 else f"word{i}"
+        for i in range(100_000 * scale)
+    )
+
+
+def deep_nesting(scale: int) -> str:
+    return "\n\n".join(f"Level {i} with *emphasis*" for i in range(200 * scale))
+
+
+# name -> (markdown generator, wrap blocks into one nested chain of parents)
+CORPORA = {
+    "short_paragraphs": (short_paragraphs, False),
+    "heavy_inline": (heavy_inline, False),
+    "huge_block": (huge_block, False),
+    "deep_nesting": (deep_nesting, True),
+}
+
+
+def build_tree(html_blocks: list[list[HTMLNode]], nested: bool) -> ParentNode:
+    if not nested:
+        return ParentNode(
+            tag="div",
+            children=[ParentNode(tag="p", children=leaves) for leaves in html_blocks],
+        )
+    node = ParentNode(tag="p", children=html_blocks[-1])
+    for leaves in reversed(html_blocks[:-1]):
+        node = ParentNode(tag="blockquote", children=[*leaves, node])
+    return node
+
+
+def stages(markdown: str, nested: bool):
+    """
+    Yield (stage name, callable) pairs. Each callable runs one stage on the
+    output of the previous one.
+    """
+    state = {}
+
+    def split():
+        state["blocks"] = markdown_to_blocks(markdown)
+        return state["blocks"]
+
+    def inline():
+        state["text_nodes"] = [text_to_textnodes(b) for b in state["blocks"]]
+        return state["text_nodes"]
+
+    def to_html_nodes():
+        state["html_blocks"] = [
+            [text_node_to_html_node(n) for n in nodes]
+            for nodes in state["text_nodes"]
+        ]
+        state["tree"] = build_tree(state["html_blocks"], nested)
+        return state["html_blocks"]
+
+    def render():
+        return state["tree"].to_html()
+
+    yield "markdown_to_blocks", split
+    yield "text_to_textnodes", inline
+    yield "text_node_to_html_node", to_html_nodes
+    yield "ParentNode.to_html", render
+
+
+def measure(markdown: str, nested: bool, repeat: int) -> list[dict]:
+    size_mb = len(markdown.encode("utf-8")) / 1e6
+    results = []
+    for name, run in stages(markdown, nested):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = len(tracemalloc.take_snapshot().traces)
+        tracemalloc.stop()
+        del result
+        results.append(
+            {
+                "stage": name,
+                "seconds": best,
+                "mb_per_s": size_mb / best if best else None,
+                "peak_traced_bytes": peak,
+                "allocations": allocations,
+            }
+        )
+    return results
+
+
+def peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline")
+    parser.add_argument(
+        "--corpus",
+        choices=sorted(CORPORA),
+        action="append",
+        help="Corpus to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--scale", type=int, default=1, help="Corpus size factor")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "corpora": {},
+    }
+    for name in args.corpus or sorted(CORPORA):
+        generate, nested = CORPORA[name]
+        markdown = generate(args.scale)
+        report["corpora"][name] = {
+            "bytes": len(markdown.encode("utf-8")),
+            "stages": measure(markdown, nested, args.repeat),
+        }
+    report["peak_rss_bytes"] = peak_rss_bytes()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, corpus in report["corpora"].items():
+        print(f"{name} ({corpus['bytes'] / 1e6:.2f} MB)")
+        for stage in corpus["stages"]:
+            print(
+                f"  {stage['stage']:<24}{stage['seconds'] * 1000:>10.2f} ms"
+                f"{stage['mb_per_s']:>10.1f} MB/s"
+                f"{stage['peak_traced_bytes'] / 1e6:>10.2f} MB peak"
+                f"{stage['allocations']:>10} allocs"
+            )
+    if report["peak_rss_bytes"] is not None:
+        print(f"peak RSS {report['peak_rss_bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
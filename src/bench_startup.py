@@ -0,0 +1,61 @@
+"""
+Import time and per-invocation latency of the converter, the costs that
+dominate when CI runs it once per changed file.
+
+    python3 src/bench_startup.py [runs]
+
+"import" rows run a fresh interpreter that only imports the module.
+"cli" converts one page per process; "batch" converts the same pages in a
+single `main.py --batch` process and reports the cost per page.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+MODULES = ["textnode", "htmlnode", "inline_markdown", "markdown_blocks", "main"]
+PAGE = "# Title\n\nSome **bold** and *italic* text with a [link](https://boot.dev)\n"
+
+
+def median_seconds(args: list[str], runs: int, stdin: str = None) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            args, cwd=SRC, input=stdin, text=True, check=True, capture_output=True
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    python = sys.executable
+    baseline = median_seconds([python, "-c", "pass"], runs)
+    print(f"{'bare interpreter':<28}{baseline * 1000:>8.1f} ms")
+    for module in MODULES:
+        seconds = median_seconds([python, "-c", f"import {module}"], runs)
+        print(f"{'import ' + module:<28}{(seconds - baseline) * 1000:>8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pairs = []
+        for i in range(runs):
+            src = os.path.join(tmp, f"page{i}.md")
+            with open(src, "w", encoding="utf-8") as f:
+                f.write(PAGE)
+            pairs.append((src, os.path.join(tmp, f"page{i}.html")))
+        cli = median_seconds(
+            [python, "main.py", "--batch"], runs, stdin="\t".join(pairs[0]) + "\n"
+        )
+        batch_input = "".join(f"{src}\t{dest}\n" for src, dest in pairs)
+        batch = median_seconds([python, "main.py", "--batch"], 3, stdin=batch_input)
+    print(f"{'cli, one page per process':<28}{cli * 1000:>8.1f} ms/page")
+    print(f"{'batch, one process':<28}{batch / runs * 1000:>8.1f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import os
+import shutil
+from collections.abc import Callable
+
+from fileutil import write_atomic
+
+# Bump when the on-disk layout changes.
+CACHE_FORMAT = 1
+
+# Editing any of these changes what a block renders to, so their source is
+# part of the version stamp.
+_PARSER_MODULES = ("htmlnode", "inline_markdown", "markdown_blocks", "textnode")
+
+
+def parser_version() -> str:
+    digest = hashlib.sha256(f"format {CACHE_FORMAT}".encode())
+    for name in _PARSER_MODULES:
+        with open(importlib.import_module(name).__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class BlockCache:
+    """
+    On-disk cache from a markdown block to its rendered HTML fragment.
+
+    Entries live in directory/<2 hex>/<sha256 of the block>.html and are
+    written atomically, so several build processes can share one cache.
+    The mtime of an entry is bumped on every hit and the least recently
+    used entries are evicted once the total size passes max_bytes.
+    A VERSION file holds the parser version the entries were rendered
+    with; on a mismatch the whole cache is dropped.
+    """
+
+    # Extension of entry files; subclasses storing something else use
+    # their own, along with _read_entry/_write_entry.
+    suffix = ".html"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        version: str = None,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else parser_version()
+        self.hits = 0
+        self.misses = 0
+        self._check_version()
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def get(self, block: str) -> str | None:
+        data = self._read_entry(block)
+        return data.decode("utf-8") if data is not None else None
+
+    def put(self, block: str, html: str) -> None:
+        self._write_entry(block, html.encode("utf-8"))
+
+    def render(self, block: str, render_block: Callable[[str], str]) -> str:
+        html = self.get(block)
+        if html is None:
+            html = render_block(block)
+            self.put(block, html)
+        return html
+
+    def prune(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 3/4 of the bound so a full cache doesn't rescan the
+        # directory on every put.
+        target = self.max_bytes * 3 // 4
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        self._size = 0
+
+    def _check_version(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        version_path = os.path.join(self.directory, "VERSION")
+        try:
+            with open(version_path, encoding="utf-8") as f:
+                if f.read().strip() == self.version:
+                    return
+        except FileNotFoundError:
+            pass
+        self.clear()
+        with open(version_path, "w", encoding="utf-8") as f:
+            f.write(self.version)
+
+    def _read_entry(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def _write_entry(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            old_size = os.stat(path).st_size
+        except FileNotFoundError:
+            old_size = 0
+        write_atomic(path, data)
+        self._size += len(data) - old_size
+        if self._size > self.max_bytes:
+            # _size only counts this process's writes and evictions, so
+            # look at what is really on disk before evicting anything.
+            self._size = sum(size for _, size, _ in self._entries())
+            if self._size > self.max_bytes:
+                self.prune()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + self.suffix)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            subdir = os.path.join(self.directory, name)
+            if not os.path.isdir(subdir):
+                continue
+            with os.scandir(subdir) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
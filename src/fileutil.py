@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+# os.umask can only be read by setting it, which would race with files
+# other threads create, so it is read once on import.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write data to path through a temporary file in the same directory
+    that is renamed over it, so readers never see half a file. The file
+    gets the permissions of one created with open, not the 0600 of
+    mkstemp, since what is written here gets deployed.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    Base for tests that work on files. Every test gets a fresh temporary
+    directory, self.tmp, that is removed after it, with self.content and
+    self.dest naming the usual source and output directories in it (they
+    are not created).
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public")
+
+    def write(self, path, data):
+        """
+        Write str or bytes to path, taken relative to self.tmp unless it is
+        absolute, creating its directory. Returns the full path.
+        """
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, bytes):
+            with open(path, "wb") as f:
+                f.write(data)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        return path
+
+    def read(self, rel_path):
+        """The text of an output, rel_path being relative to self.dest."""
+        with open(os.path.join(self.dest, rel_path), encoding="utf-8") as f:
+            return f.read()
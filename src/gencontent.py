@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+
+import profiling
+from htmlnode import escape_html
+from markdown_blocks import (
+    extract_title,
+    inline_functions,
+    markdown_to_html,
+    parsed_to_html,
+    set_inline_functions,
+    use_inline_memo,
+)
+
+# The block cache, the memo, gzip and the process pool are imported where
+# they are first used, so short runs that need none of them start faster.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from ast_cache import ASTCache
+    from batch import DocumentError
+    from block_cache import BlockCache
+
+# Set per worker process by _init_worker.
+_cache: BlockCache = None
+_ast_cache: ASTCache = None
+_gzip_output = False
+_template: str = None
+# Pool workers only hand their page profiles back, so they drop them after.
+_drop_profiles = False
+
+
+def generate_page(
+    from_path: str,
+    dest_path: str,
+    cache: BlockCache = None,
+    gzip_output: bool = False,
+    template: str = None,
+    ast_cache: ASTCache = None,
+) -> None:
+    """
+    With a template, the page is rendered into it with fill_template;
+    otherwise the bare <div> of the page is written.
+    With an ast_cache, the page is rendered from its parsed blocks, which
+    are taken from or stored in the cache; cache is not used then.
+    With gzip_output a precompressed dest_path + ".gz" is written next to
+    the page for the server to hand out as is.
+    """
+    html = render_page(from_path, cache, template, ast_cache).encode("utf-8")
+    profiling.count("output_bytes", len(html))
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    with open(dest_path, "wb") as f:
+        f.write(html)
+    if gzip_output:
+        import gzip
+
+        with open(dest_path + ".gz", "wb") as f:
+            f.write(gzip.compress(html, compresslevel=9))
+
+
+def render_page(
+    from_path: str,
+    cache: BlockCache = None,
+    template: str = None,
+    ast_cache: ASTCache = None,
+) -> str:
+    """The HTML generate_page writes for from_path."""
+    with open(from_path, encoding="utf-8") as f:
+        markdown = f.read()
+    if ast_cache is not None:
+        html = parsed_to_html(ast_cache.parse(markdown))
+    else:
+        html = markdown_to_html(markdown, cache)
+    if template is not None:
+        title = extract_title(markdown)
+        if title is None:
+            title = os.path.splitext(os.path.basename(from_path))[0]
+        html = fill_template(template, title, html)
+    return html
+
+
+def fill_template(template: str, title: str, content: str) -> str:
+    """
+    Replace {{ Title }} in template with the escaped title and
+    {{ Content }} with the rendered page.
+    """
+    return template.replace("{{ Title }}", escape_html(title)).replace(
+        "{{ Content }}", content
+    )
+
+
+def find_pages(content_dir: str, dest_dir: str) -> list[tuple[str, str]]:
+    """
+    Pair every .md file under content_dir with its .html path under
+    dest_dir, keeping the directory layout.
+    """
+    pages = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(".md"):
+                continue
+            from_path = os.path.join(root, name)
+            pages.append((from_path, dest_path_for(from_path, content_dir, dest_dir)))
+    return pages
+
+
+def dest_path_for(from_path: str, content_dir: str, dest_dir: str) -> str:
+    rel_path = os.path.relpath(from_path, content_dir)
+    return os.path.join(dest_dir, os.path.splitext(rel_path)[0] + ".html")
+
+
+def generate_pages_recursive(
+    content_dir: str,
+    dest_dir: str,
+    workers: int = None,
+    chunksize: int = 16,
+    cache_dir: str = None,
+    gzip_output: bool = False,
+    memo_size: int = 0,
+    profiler: profiling.Profiler = None,
+    profile_passes: bool = False,
+    template: str = None,
+    ast_cache_dir: str = None,
+) -> int:
+    """
+    Convert every page under content_dir and return how many were written.
+    Pages are spread over a process pool of workers processes (default: one
+    per CPU) and handed out chunksize pages at a time. workers=1 builds in
+    this process without a pool.
+    A memo_size above 0 gives each worker an InlineMemo of that size.
+    With a profiler, every page is profiled and its DocumentProfile ends up
+    in profiler.documents; see profiling.install for profile_passes.
+    template is the text of the page template passed to generate_page,
+    and ast_cache_dir the directory of an ASTCache for it.
+    """
+    return generate_pages(
+        find_pages(content_dir, dest_dir),
+        workers=workers,
+        chunksize=chunksize,
+        cache_dir=cache_dir,
+        gzip_output=gzip_output,
+        memo_size=memo_size,
+        profiler=profiler,
+        profile_passes=profile_passes,
+        template=template,
+        ast_cache_dir=ast_cache_dir,
+    )
+
+
+def generate_pages(
+    pages: list[tuple[str, str]],
+    workers: int = None,
+    chunksize: int = 16,
+    cache_dir: str = None,
+    gzip_output: bool = False,
+    memo_size: int = 0,
+    profiler: profiling.Profiler = None,
+    profile_passes: bool = False,
+    template: str = None,
+    ast_cache_dir: str = None,
+    keep_going: bool = False,
+    on_page: Callable[[tuple[str, str], DocumentError | None], None] = None,
+) -> int:
+    """
+    Convert the given (from_path, dest_path) pairs and return how many were
+    written. The options are those of generate_pages_recursive.
+    With keep_going, a page that fails to convert does not stop the build;
+    the error is turned into a batch.DocumentError in the process that hit
+    it. on_page is called in this process with every page and its error,
+    or None, in the order of pages.
+    """
+    if not pages:
+        return 0
+    task = _generate_page_checked if keep_going else _generate_page_task
+    written = 0
+    if workers == 1:
+        # _init_worker sets up this process like a pool worker, so put the
+        # inline functions of the caller back afterwards.
+        inline = inline_functions()
+        try:
+            _init_worker(
+                cache_dir,
+                gzip_output,
+                memo_size,
+                None,
+                profile_passes,
+                template,
+                ast_cache_dir,
+            )
+            if profiler is not None:
+                profiling.install(profiler, profile_passes)
+            for page in pages:
+                _, error = task(page)
+                written += error is None
+                if on_page is not None:
+                    on_page(page, error)
+        finally:
+            profiling.install(None)
+            set_inline_functions(*inline)
+        return written
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            cache_dir,
+            gzip_output,
+            memo_size,
+            profiling.Profiler() if profiler is not None else None,
+            profile_passes,
+            template,
+            ast_cache_dir,
+        ),
+    ) as executor:
+        results = executor.map(task, pages, chunksize=chunksize)
+        for page, (doc, error) in zip(pages, results):
+            if doc is not None and profiler is not None:
+                profiler.documents.append(doc)
+            written += error is None
+            if on_page is not None:
+                on_page(page, error)
+    return written
+
+
+def _init_worker(
+    cache_dir: str | None,
+    gzip_output: bool,
+    memo_size: int,
+    profiler: profiling.Profiler | None,
+    profile_passes: bool,
+    template: str | None,
+    ast_cache_dir: str | None,
+) -> None:
+    global _cache, _ast_cache, _gzip_output, _template, _drop_profiles
+    _cache = None
+    if cache_dir:
+        from block_cache import BlockCache
+
+        _cache = BlockCache(cache_dir)
+    _ast_cache = None
+    if ast_cache_dir:
+        from ast_cache import ASTCache
+
+        _ast_cache = ASTCache(ast_cache_dir)
+    _gzip_output = gzip_output
+    _template = template
+    _drop_profiles = profiler is not None
+    if memo_size:
+        from inline_cache import InlineMemo
+
+        use_inline_memo(InlineMemo(memo_size))
+    else:
+        use_inline_memo(None)
+    profiling.install(profiler, profile_passes)
+
+
+def _generate_page_task(
+    page: tuple[str, str],
+) -> tuple[profiling.DocumentProfile | None, None]:
+    from_path, dest_path = page
+    profiler = profiling.active()
+    if profiler is None:
+        generate_page(
+            from_path, dest_path, _cache, _gzip_output, _template, _ast_cache
+        )
+        return None, None
+    with profiler.document(from_path) as doc:
+        generate_page(
+            from_path, dest_path, _cache, _gzip_output, _template, _ast_cache
+        )
+    if _drop_profiles:
+        profiler.documents.clear()
+    return doc, None
+
+
+def _generate_page_checked(
+    page: tuple[str, str],
+) -> tuple[profiling.DocumentProfile | None, DocumentError | None]:
+    try:
+        return _generate_page_task(page)
+    except Exception as e:
+        from batch import document_error
+
+        profiler = profiling.active()
+        if _drop_profiles and profiler is not None:
+            profiler.documents.clear()
+        return None, document_error(page[0], page[1], e)
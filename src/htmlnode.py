@@ -1,12 +1,39 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+
+# typing is only needed for annotations, which are never evaluated here.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import TextIO
+
+
+# Rendered attribute strings by tuple(props.items()); emptied once full so
+# pages full of one-off hrefs can't grow it without bound.
+PROPS_CACHE_SIZE = 4096
+_props_cache: dict[tuple[tuple[str, str], ...], str] = {}
+
+
+def escape_html(text: str, quote: bool = True) -> str:
+    """
+    Escape &, < and > in text, and with quote also " and ', the same as
+    html.escape, which is not used so that importing this module stays
+    free of re.
+    """
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if quote:
+        text = text.replace('"', "&quot;").replace("'", "&#x27;")
+    return text
+
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str = None,
         value: str = None,
-        children: list[HTMLNode] = None,
+        children: Iterable[HTMLNode] = None,
         props: dict[str, str] = None,
     ) -> None:
         """
@@ -23,15 +50,38 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def to_html_chunks(self) -> Iterator[str]:
+        yield self.to_html()
+
     def props_to_html(self):
+        """
+        Attribute values are escaped; values that aren't strings, such as
+        a number or the None url of a link without one, are rendered with
+        str. The rendered string is cached per set of props, since the
+        same ones (a shared class, a site-wide link) tend to be rendered
+        over and over.
+        """
         if self.props:
-            return "".join(f' {key}="{val}"' for key, val in self.props.items())
+            key = tuple(self.props.items())
+            if not all(type(val) is str for _, val in key):
+                # Not cached: 1 and True would share a key, and a list
+                # value can't be one.
+                return _render_props(key)
+            rendered = _props_cache.get(key)
+            if rendered is None:
+                if len(_props_cache) >= PROPS_CACHE_SIZE:
+                    _props_cache.clear()
+                rendered = _render_props(key)
+                _props_cache[key] = rendered
+            return rendered
 
     def __repr__(self) -> str:
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         value: str,
@@ -41,35 +91,84 @@ class LeafNode(HTMLNode):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
     def to_html(self):
-        if self.value is None:
+        value = self.value
+        if value is None:
             raise ValueError("A LeafNode must have a value")
+        # Most text has nothing to escape; checking first skips the call.
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_html(value, quote=False)
         if self.tag is None:
-            return self.value
+            return value
         if self.props is None:
-            return f"<{self.tag}>{self.value}</{self.tag}>"
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
-        children: list[HTMLNode],
+        children: Iterable[HTMLNode],
         tag: str = None,
         props: dict[str, str] = None,
     ) -> None:
+        """
+        children may be any iterable, including a generator that builds the
+        child nodes as they are rendered; such a node can only be rendered
+        once, and an empty generator renders as an empty element.
+        """
         super().__init__(tag=tag, value=None, children=children, props=props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag")
-        if not self.children:
-            raise ValueError("ParentNode needs at least one child")
-        html_str = ""
-        html_str += f"<{self.tag}>"
-        for child in self.children:
+        return "".join(_iter_html(self))
+
+    def to_html_chunks(self) -> Iterator[str]:
+        """
+        Yield the HTML of this node piece by piece while walking the tree,
+        pulling children from their iterables only as they are reached.
+        """
+        return _iter_html(self)
+
+
+def write_html(node: HTMLNode, sink: TextIO) -> None:
+    """
+    Render node straight into a file-like sink such as an open file or
+    io.StringIO, without building the whole page as one string first.
+    """
+    write = sink.write
+    for chunk in node.to_html_chunks():
+        write(chunk)
+
+
+def _iter_html(root: ParentNode) -> Iterator[str]:
+    # Walks the tree with an explicit stack of child iterators so deep
+    # nesting doesn't hit the recursion limit.
+    yield _open_tag(root)
+    stack = [(iter(root.children), f"</{root.tag}>")]
+    push = stack.append
+    while stack:
+        children, close = stack[-1]
+        for child in children:
             if isinstance(child, ParentNode):
-                html_str += child.to_html()
-            else:
-                html_str += child.to_html()
-        html_str += f"</{self.tag}>"
-        return html_str
+                yield _open_tag(child)
+                push((iter(child.children), f"</{child.tag}>"))
+                break
+            yield child.to_html()
+        else:
+            stack.pop()
+            yield close
+
+
+def _render_props(items: Iterable[tuple[str, object]]) -> str:
+    return "".join(f' {name}="{escape_html(str(val))}"' for name, val in items)
+
+
+def _open_tag(node: ParentNode) -> str:
+    if node.tag is None:
+        raise ValueError("ParentNode must have a tag")
+    if not node.children:
+        raise ValueError("ParentNode needs at least one child")
+    if node.props:
+        return f"<{node.tag}{node.props_to_html()}>"
+    return f"<{node.tag}>"
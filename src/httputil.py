@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import email.utils
+import os
+import threading
+from collections import OrderedDict
+
+# Header logic and the page cache of the static file server, kept apart
+# from the handler so they can be tested without a socket.
+
+
+def etag_for(stat: os.stat_result, gzip: bool = False) -> str:
+    """
+    A strong ETag for a file in the state stat describes; the gzip
+    encoded body of the same file gets a tag of its own.
+    """
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}'
+    return etag + ('-gz"' if gzip else '"')
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    mtime: float,
+) -> bool:
+    """
+    Whether a conditional GET for a file with the given etag and mtime
+    is answered with 304 Not Modified. If-Modified-Since only counts when
+    there is no If-None-Match, and a date that can't be parsed is
+    ignored.
+    """
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+    if if_modified_since is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return int(mtime) <= since.timestamp()
+
+
+def parse_range(header: str | None, length: int) -> tuple[int, int] | bool | None:
+    """
+    The (first, last) byte positions that the Range header asks for in a
+    body of length bytes, False when the range is unsatisfiable (a 416)
+    and None when the whole body should be sent: no header, a unit other
+    than bytes, a malformed spec or several ranges, which aren't
+    supported.
+    """
+    if header is None or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last):
+        return None
+    if (first and not first.isdecimal()) or (last and not last.isdecimal()):
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else length - 1
+        if start > end and last:
+            return None
+    else:
+        # A suffix range: the last `last` bytes.
+        start = max(length - int(last), 0)
+        end = length - 1
+    if start >= length or end < start:
+        return False
+    return start, min(end, length - 1)
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an Accept-Encoding header allows a gzip body."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip() == "gzip":
+            params = params.replace(" ", "")
+            if not params.startswith("q="):
+                return True
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def choose_encoding(
+    accept_encoding: str | None, mtime_ns: int, gz_mtime_ns: int | None
+) -> str | None:
+    """
+    "gzip" to send the precompressed sibling of a file modified at
+    mtime_ns, which was itself modified at gz_mtime_ns (None if there is
+    none), or None to send the file as it is. A sibling older than the
+    file is stale and never used.
+    """
+    if gz_mtime_ns is None or gz_mtime_ns < mtime_ns:
+        return None
+    return "gzip" if accepts_gzip(accept_encoding) else None
+
+
+class PageCache:
+    """
+    Bounded in-memory cache of file bodies keyed by path, mtime and size,
+    so an edited file is never served stale. Least recently used entries
+    are dropped once the total passes max_bytes.
+    """
+
+    def __init__(
+        self, max_bytes: int = 32 * 1024 * 1024, max_entry_bytes: int = 1024 * 1024
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result) -> bytes | None:
+        """The body of path as of stat, or None if it is too big to cache."""
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+        if stat.st_size > self.max_entry_bytes:
+            return None
+        with open(path, "rb") as f:
+            body = f.read()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = body
+                self._size += len(body)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return body
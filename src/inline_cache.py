@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from inline_markdown import text_to_textnodes
+from textnode import TextNode
+
+
+class LRUCache:
+    """
+    Bounded mapping that drops the least recently used entry once maxsize
+    is reached, counting hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class InlineMemo:
+    """
+    Memoizes text_to_textnodes for inline text that repeats across a site,
+    like nav lines, footers and table cells. Converting the nodes to HTML
+    nodes is cheaper than a lookup would be, so that is not memoized.
+
+    Results are stored as tuples of plain values and every call builds
+    fresh nodes from them, so callers are free to mutate what they get
+    back without corrupting the cache.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.textnodes = LRUCache(maxsize)
+
+    def text_to_textnodes(self, text: str) -> list[TextNode]:
+        frozen = self.textnodes.get(text)
+        if frozen is None:
+            frozen = _freeze(text_to_textnodes(text))
+            self.textnodes.put(text, frozen)
+        return _thaw(frozen)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {"text_to_textnodes": self.textnodes.stats()}
+
+
+# Both rebuild the nesting with an explicit stack, like
+# textnode.walk_nodes, rather than recursing.
+
+
+def _freeze(nodes: list[TextNode]) -> tuple:
+    frozen: list[tuple] = []
+    # (children left to freeze, their frozen tuples so far, their parent)
+    stack = [(iter(nodes), frozen, None)]
+    while stack:
+        children, done, parent = stack[-1]
+        for node in children:
+            if node.children:
+                stack.append((iter(node.children), [], node))
+                break
+            done.append((node.text, node.text_type, node.url, None))
+        else:
+            stack.pop()
+            if parent is not None:
+                stack[-1][1].append(
+                    (parent.text, parent.text_type, parent.url, tuple(done))
+                )
+    return tuple(frozen)
+
+
+def _thaw(frozen: tuple) -> list[TextNode]:
+    nodes: list[TextNode] = []
+    stack = [(iter(frozen), nodes)]
+    while stack:
+        entries, thawed = stack[-1]
+        for text, text_type, url, children in entries:
+            if children:
+                node = TextNode(text, text_type, url, [])
+                thawed.append(node)
+                stack.append((iter(children), node.children))
+                break
+            thawed.append(TextNode(text, text_type, url))
+        else:
+            stack.pop()
+    return nodes
@@ -1,4 +1,10 @@
-import re
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import namedtuple
+from collections.abc import Sequence
+from heapq import merge
+
 from textnode import (
     TextNode,
     text_type_bold,
@@ -7,10 +13,28 @@ from textnode import (
     text_type_italic,
     text_type_link,
     text_type_text,
+    walk_nodes,
 )
 
+# re is imported by _compile_patterns when it is first needed; here it is
+# only named in annotations, which are never evaluated.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import re
 
-def text_to_textnodes(text: str) -> list[TextNode]:
+
+def text_to_textnodes(text: str, single_pass: bool = True) -> list[TextNode]:
+    """
+    Parse inline markdown into a list of TextNodes; bold and italic runs
+    that contain other markup carry it as children (see scan_inline).
+    single_pass=False runs the original chain of split_nodes_* passes,
+    which gives flat nodes only and raises MarkdownSyntaxError on an
+    unmatched delimiter.
+    """
+    if single_pass:
+        return scan_inline(text)
+    if _IMAGE_RE is None:
+        _compile_patterns()
     return split_nodes_link(
         split_nodes_image(
             split_nodes_delimiter(
@@ -30,6 +54,258 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     )
 
 
+def scan_inline(text: str) -> list[TextNode]:
+    """
+    Parse inline markdown in one left-to-right pass, matching emphasis
+    with a delimiter stack the way CommonMark does.
+
+    Code spans, images and links are taken whole where they start, so *
+    inside them is never emphasis. A run of * opens and/or closes
+    emphasis depending on the characters around it; a closer is matched
+    with the nearest compatible opener on the stack, taking ** when both
+    sides have two and * otherwise. Whatever is left unmatched, like a
+    stray * or ` or an unclosed [, stays literal text instead of raising.
+
+    Bold or italic whose content is plain text is a flat TextNode as
+    before. Content with other markup, such as **bold with *italic*
+    inside**, becomes the children of the node, whose own text is then
+    empty so that deep nesting doesn't copy the same text into every
+    level.
+    """
+    if "*" not in text and "`" not in text and "[" not in text:
+        # Nothing to parse, which is most text.
+        return [TextNode(text=text, text_type=text_type_text)] if text else []
+    if _SPECIAL_RE is None:
+        _compile_patterns()
+    # Literal text, finished nodes and the runs of the openers still on
+    # the stack, in order. Matching an opener moves everything after it
+    # into one node; an opener that is never matched stays literal *.
+    # Literal text only goes in when something else has to follow it, so
+    # a stray delimiter costs nothing.
+    items: list[str | TextNode] = []
+    stack: list[_Opener] = []
+    # Per (closer can also open, closer length % 3): the stack depth below
+    # which no opener can match such a closer. Keeps the search for
+    # openers linear when many of them can't match.
+    bottoms: dict[tuple[bool, int], int] = {}
+    # Lengths of backtick runs known to have no closing run further on.
+    unclosed_code: set[int] = set()
+    # No image or link can start after the last ")".
+    last_paren = None
+    length = len(text)
+    # text[mark:] is not in items yet; pos is where the next token may start.
+    mark = pos = 0
+    search = _SPECIAL_RE.search
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        start, end = match.span()
+        pos = end
+        first = text[start]
+        if first == "*":
+            before = text[start - 1] if start else " "
+            inner = match.group(2)
+            if inner is not None:
+                # A whole *x* or **x** with no other markup in it, which
+                # is taken in one go when it can only be matched the way
+                # it reads: its opener can open and, with openers on the
+                # stack, can't close, and its closer can close.
+                after = text[end] if end < length else " "
+                opener_after, closer_before = inner[0], inner[-1]
+                if (
+                    (opener_after.isalnum() or not before.isalnum())
+                    and (
+                        not stack
+                        or before.isspace()
+                        or (not before.isalnum() and opener_after.isalnum())
+                    )
+                    and (closer_before.isalnum() or not after.isalnum())
+                ):
+                    if mark < start:
+                        items.append(text[mark:start])
+                    bold = match.group(1) == "**"
+                    text_type = text_type_bold if bold else text_type_italic
+                    items.append(TextNode(text=inner, text_type=text_type))
+                    mark = end
+                    continue
+                # Otherwise only the opening run is taken here.
+                pos = end = start + len(match.group(1))
+            after = text[end] if end < length else " "
+            # CommonMark's left- and right-flanking rules.
+            can_open = not after.isspace() and (after.isalnum() or not before.isalnum())
+            can_close = not before.isspace() and (
+                before.isalnum() or not after.isalnum()
+            )
+            count = end - start
+            if can_close and stack:
+                if mark < start:
+                    items.append(text[mark:start])
+                count = _close_emphasis(items, stack, bottoms, count, can_open)
+                # What is left of the run is its last count *.
+                mark = end - count
+            if count and can_open:
+                if mark < end - count:
+                    items.append(text[mark : end - count])
+                stack.append(_Opener(count, end - start, can_close, len(items)))
+                items.append(text[end - count : end])
+                mark = end
+        elif first == "`":
+            width = end - start
+            close = -1
+            if width not in unclosed_code:
+                close = _find_code_close(text, end, width)
+            if close == -1:
+                unclosed_code.add(width)
+                continue
+            if mark < start:
+                items.append(text[mark:start])
+            items.append(TextNode(text=text[end:close], text_type=text_type_code))
+            mark = pos = close + width
+        else:
+            if last_paren is None:
+                last_paren = text.rfind(")")
+            if start > last_paren:
+                continue
+            link = _IMAGE_OR_LINK_RE.match(text, start)
+            if link is None:
+                continue
+            if mark < start:
+                items.append(text[mark:start])
+            bang, val, url = link.groups()
+            text_type = text_type_image if bang else text_type_link
+            items.append(TextNode(text=val, text_type=text_type, url=url))
+            mark = pos = link.end()
+    if mark < length:
+        items.append(text[mark:])
+    return _finish(items)
+
+
+class _Opener:
+    # A run of * on the delimiter stack, at items[index]; count of its
+    # length * are still unused.
+    __slots__ = ("count", "length", "can_close", "index")
+
+    def __init__(self, count: int, length: int, can_close: bool, index: int) -> None:
+        self.count = count
+        self.length = length
+        self.can_close = can_close
+        self.index = index
+
+
+def _close_emphasis(
+    items: list[str | TextNode],
+    stack: list[_Opener],
+    bottoms: dict[tuple[bool, int], int],
+    length: int,
+    can_open: bool,
+) -> int:
+    """
+    Match a closing run of length * against the openers on the stack and
+    return how many of its * are left over.
+    """
+    count = length
+    key = (can_open, length % 3)
+    while count and stack:
+        bottom = min(bottoms.get(key, 0), len(stack))
+        i = len(stack) - 1
+        while i >= bottom:
+            opener = stack[i]
+            # The "multiple of 3" rule: a run that can both open and
+            # close only pairs up when the run lengths don't sum to a
+            # multiple of 3, unless both are multiples of 3.
+            if not (
+                (opener.can_close or can_open)
+                and (opener.length + length) % 3 == 0
+                and (opener.length % 3 or length % 3)
+            ):
+                break
+            i -= 1
+        if i < bottom:
+            bottoms[key] = len(stack)
+            return count
+        # Openers above the match stay in items and end up literal.
+        del stack[i + 1 :]
+        opener = stack[i]
+        use = 2 if opener.count >= 2 and count >= 2 else 1
+        text_type = text_type_bold if use == 2 else text_type_italic
+        first = opener.index + 1
+        if len(items) == first + 1 and type(items[first]) is str:
+            node = TextNode(text=items[first], text_type=text_type)
+        else:
+            node = _emphasis(items[first:], text_type)
+        opener.count -= use
+        count -= use
+        if opener.count:
+            # The rest of the opener's run wraps around the new node.
+            items[first:] = [node]
+            items[opener.index] = "*" * opener.count
+        else:
+            stack.pop()
+            items[opener.index :] = [node]
+        if bottoms:
+            for other, depth in bottoms.items():
+                if depth > len(stack):
+                    bottoms[other] = len(stack)
+    return count
+
+
+def _emphasis(items: list[str | TextNode], text_type: str) -> TextNode:
+    children = _finish(items)
+    if len(children) == 1 and children[0].text_type == text_type_text:
+        return TextNode(text=children[0].text, text_type=text_type)
+    return TextNode(text="", text_type=text_type, children=children)
+
+
+def _finish(items: list[str | TextNode]) -> list[TextNode]:
+    # Literal pieces next to each other become one text node.
+    nodes: list[TextNode] = []
+    pending: list[str] = []
+    for item in items:
+        if type(item) is str:
+            pending.append(item)
+            continue
+        if pending:
+            nodes.append(TextNode(text="".join(pending), text_type=text_type_text))
+            pending = []
+        nodes.append(item)
+    if pending:
+        nodes.append(TextNode(text="".join(pending), text_type=text_type_text))
+    return nodes
+
+
+def _find_code_close(text: str, pos: int, width: int) -> int:
+    # Start of the next run of exactly width backticks, or -1.
+    fence = "`" * width
+    while True:
+        found = text.find(fence, pos)
+        if found == -1:
+            return -1
+        run_end = found + width
+        while run_end < len(text) and text[run_end] == "`":
+            run_end += 1
+        if run_end - found == width:
+            return found
+        pos = run_end
+
+
+class MarkdownSyntaxError(Exception):
+    """
+    Inline markdown that can't be parsed, like a delimiter that is never
+    closed. text is the text that was being parsed and offset the position
+    in it of what could not be parsed.
+    """
+
+    def __init__(self, message: str, text: str, offset: int) -> None:
+        super().__init__(message)
+        self.text = text
+        self.offset = offset
+
+    def __reduce__(self):
+        # Raised in pool workers, so it has to survive pickling.
+        return type(self), (self.args[0], self.text, self.offset)
+
+
 def split_nodes_delimiter(
     old_nodes: list[TextNode], delimiter: str, text_type: str
 ) -> list[TextNode]:
@@ -40,7 +316,11 @@ def split_nodes_delimiter(
             continue
         split_strings = node.text.split(delimiter)
         if len(split_strings) % 2 == 0:
-            raise Exception(f"Invalid Markdown syntax. No closing {delimiter} found.")
+            raise MarkdownSyntaxError(
+                f"Invalid Markdown syntax. No closing {delimiter} found.",
+                node.text,
+                node.text.rfind(delimiter),
+            )
 
         for i, n in enumerate(split_strings):
             if len(n) == 0:
@@ -53,54 +333,145 @@ def split_nodes_delimiter(
 
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
-    new_nodes: list[TextNode] = []
-    for node in old_nodes:
-        if node.text_type != text_type_text:
-            new_nodes.append(node)
-            continue
-        images: list[tuple[str, str]] = extract_markdown_images(node.text)
-        if not images:
-            new_nodes.append(node)
-            continue
-        text = node.text
-        for alt, url in images:
-            text_node_text, _, text = text.partition(f"![{alt}]({url})")
-            if text_node_text:
-                new_nodes.append(
-                    TextNode(text=text_node_text, text_type=text_type_text)
-                )
-            new_nodes.append(TextNode(text_type=text_type_image, text=alt, url=url))
-        if text:
-            new_nodes.append(TextNode(text=text, text_type=text_type_text))
-    return new_nodes
+    if _IMAGE_RE is None:
+        _compile_patterns()
+    return _split_nodes_pattern(old_nodes, _IMAGE_RE, text_type_image)
 
 
 def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    if _LINK_RE is None:
+        _compile_patterns()
+    return _split_nodes_pattern(old_nodes, _LINK_RE, text_type_link)
+
+
+def _split_nodes_pattern(
+    old_nodes: list[TextNode], pattern: re.Pattern, text_type: str
+) -> list[TextNode]:
     new_nodes: list[TextNode] = []
     for node in old_nodes:
         if node.text_type != text_type_text:
             new_nodes.append(node)
             continue
-        links: list[tuple[str, str]] = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
-            continue
         text = node.text
-        for val, url in links:
-            text_node_text, _, text = text.partition(f"[{val}]({url})")
-            if text_node_text:
+        pos = 0
+        for match in pattern.finditer(text):
+            if match.start() > pos:
                 new_nodes.append(
-                    TextNode(text=text_node_text, text_type=text_type_text)
+                    TextNode(text=text[pos : match.start()], text_type=text_type_text)
                 )
-            new_nodes.append(TextNode(text_type=text_type_link, text=val, url=url))
-        if text:
-            new_nodes.append(TextNode(text=text, text_type=text_type_text))
+            val, url = match.groups()
+            new_nodes.append(TextNode(text=val, text_type=text_type, url=url))
+            pos = match.end()
+        if pos == 0:
+            new_nodes.append(node)
+        elif pos < len(text):
+            new_nodes.append(TextNode(text=text[pos:], text_type=text_type_text))
     return new_nodes
 
 
+# Compiled by _compile_patterns on first use, which keeps `re` out of the
+# import path of short runs that never parse anything.
+_IMAGE_RE: re.Pattern = None
+_LINK_RE: re.Pattern = None
+# Images and links in one pass; group 1 is "!" for an image and "" for a link.
+_IMAGE_OR_LINK_RE: re.Pattern = None
+# Where scan_inline has to look closer: runs of * or ` and [ or ![, or a
+# whole *x* or **x** with x free of those (groups 1 and 2).
+_SPECIAL_RE: re.Pattern = None
+
+
+def _compile_patterns() -> None:
+    global _IMAGE_RE, _LINK_RE, _IMAGE_OR_LINK_RE, _SPECIAL_RE
+    import re
+
+    # The lookahead only lets the regex engine skip ahead to candidate
+    # characters quickly, which it can't do for the alternation alone.
+    _SPECIAL_RE = re.compile(
+        r"(?=[*`!\[])"
+        r"(?:(\*\*?)([^\s*`\[][^*`\[]*)(?<!\s)\1(?!\*)|\*+|`+|!?\[)"
+    )
+    _IMAGE_RE = re.compile(r"!\[(.*?)\]\((.*?)\)")
+    _LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+    _IMAGE_OR_LINK_RE = re.compile(r"(!?)\[([^\[\]\n]*)\]\((.*?)\)")
+
+
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    if _IMAGE_RE is None:
+        _compile_patterns()
+    return _IMAGE_RE.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    if _LINK_RE is None:
+        _compile_patterns()
+    return _LINK_RE.findall(text)
+
+
+def extract_markdown_images_and_links(text: str) -> list[tuple[str, str, str]]:
+    """
+    Return (text_type, text, url) for every image and link in text, in the
+    order they appear.
+    """
+    if _IMAGE_OR_LINK_RE is None:
+        _compile_patterns()
+    return [
+        (text_type_image if bang else text_type_link, val, url)
+        for bang, val, url in _IMAGE_OR_LINK_RE.findall(text)
+    ]
+
+
+# node_index is the position of the TextNode the reference came from and
+# offset where in that node's text it starts; 0 for nodes that already are
+# images or links.
+MarkdownReference = namedtuple(
+    "MarkdownReference", ["text_type", "text", "url", "node_index", "offset"]
+)
+
+
+def extract_references_batch(nodes: Sequence[TextNode]) -> list[MarkdownReference]:
+    """
+    Every image and link in nodes, in order, for link checking and asset
+    manifests over a whole page or site.
+    The text of all plain text nodes is joined into one buffer and scanned
+    once. The buffer is joined with newlines, which the pattern never
+    matches across, so a reference cannot span two nodes. Nodes that
+    already are images or links are reported as they are.
+    """
+    if _IMAGE_OR_LINK_RE is None:
+        _compile_patterns()
+    texts: list[str] = []
+    starts: list[int] = []
+    text_indices: list[int] = []
+    typed: list[MarkdownReference] = []
+    pos = 0
+    for i, node in enumerate(nodes):
+        if node.text_type == text_type_text:
+            texts.append(node.text)
+            starts.append(pos)
+            text_indices.append(i)
+            pos += len(node.text) + 1
+        elif node.text_type == text_type_image or node.text_type == text_type_link:
+            typed.append(MarkdownReference(node.text_type, node.text, node.url, i, 0))
+        elif node.children:
+            # Images and links nested in bold or italic are already parsed.
+            for child in walk_nodes(node.children):
+                if child.text_type in (text_type_image, text_type_link):
+                    typed.append(
+                        MarkdownReference(child.text_type, child.text, child.url, i, 0)
+                    )
+
+    buffer = "\n".join(texts)
+    found: list[MarkdownReference] = []
+    for match in _IMAGE_OR_LINK_RE.finditer(buffer):
+        k = bisect_right(starts, match.start()) - 1
+        bang, val, url = match.groups()
+        found.append(
+            MarkdownReference(
+                text_type_image if bang else text_type_link,
+                val,
+                url,
+                text_indices[k],
+                match.start() - starts[k],
+            )
+        )
+    return list(merge(typed, found, key=lambda ref: (ref.node_index, ref.offset)))
@@ -1,8 +1,240 @@
-from textnode import TextNode
+import argparse
+import os
+import sys
+import time
+
+import profiling
+
+
+def read_batch_pairs(lines) -> list[tuple[str, str]]:
+    """
+    Parse "input<TAB>output" lines, as given to --batch on stdin, into
+    (from_path, dest_path) pairs. Blank lines are skipped.
+    """
+    pairs = []
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        from_path, sep, dest_path = line.partition("\t")
+        if not sep or not from_path or not dest_path:
+            raise ValueError(f"line {number}: expected 'input<TAB>output': {line!r}")
+        pairs.append((from_path, dest_path))
+    return pairs
 
 
 def main():
-    print(TextNode("This is a text node", "bold", "https://www.boot.dev"))
+    parser = argparse.ArgumentParser(description="Convert markdown pages to HTML")
+    parser.add_argument(
+        "--content", type=str, help="Directory of .md pages", default="content"
+    )
+    parser.add_argument(
+        "--dest", type=str, help="Directory to write .html pages to", default="public"
+    )
+    parser.add_argument(
+        "--template",
+        type=str,
+        help="HTML template with {{ Title }} and {{ Content }} placeholders"
+        " (default: write the bare page content)",
+        default=None,
+    )
+    parser.add_argument(
+        "--static",
+        type=str,
+        action="append",
+        metavar="PATH",
+        help="Static file or directory to copy into --dest when changed;"
+        " may be given more than once",
+        default=[],
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="Where to write the build manifest (default: <dest>/manifest.json)",
+        default=None,
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Also write a search index of all pages into <dest>/search",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Convert the 'input<TAB>output' path pairs read from stdin, one per"
+        " line, instead of the --content directory",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        metavar="PATH",
+        help="With --batch, record finished pages here so an interrupted batch"
+        " can be run again and resume",
+        default=None,
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        metavar="PATH",
+        help="With --batch, write a JSON report of the pages that failed",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes (default: one per CPU, or 1 with --batch)",
+        default=None,
+    )
+    parser.add_argument(
+        "--chunksize", type=int, help="Pages handed to a worker at once", default=16
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory for the rendered block cache (disabled if not given)",
+        default=None,
+    )
+    parser.add_argument(
+        "--ast-cache",
+        type=str,
+        metavar="DIR",
+        help="Directory for parsed documents, reused by rebuilds and the search"
+        " index (disabled if not given; replaces --cache-dir)",
+        default=None,
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Also write a precompressed .gz next to every page",
+    )
+    parser.add_argument(
+        "--memoize",
+        type=int,
+        help="Entries per worker in the LRU of parsed inline text (0 disables)",
+        default=0,
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        metavar="N",
+        help="Time every stage of every page and list the N slowest pages",
+        default=0,
+    )
+    parser.add_argument(
+        "--profile-passes",
+        action="store_true",
+        help="Also time the stages of inline parsing: emphasis, code spans, nodes",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace-event JSON of the build to this path",
+        default=None,
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After building, keep rebuilding pages as they change",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between checks for changes in --watch mode",
+        default=0.5,
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        try:
+            pages = read_batch_pairs(sys.stdin)
+        except ValueError as e:
+            parser.error(str(e))
+        template = None
+        if args.template is not None:
+            with open(args.template, encoding="utf-8") as f:
+                template = f.read()
+        from batch import format_error, run_batch
+
+        # A CI step usually hands over a few pages, too few to pay for a pool.
+        result = run_batch(
+            pages,
+            checkpoint_path=args.checkpoint,
+            report_path=args.report,
+            workers=args.workers or 1,
+            chunksize=args.chunksize,
+            cache_dir=args.cache_dir,
+            gzip_output=args.gzip,
+            memo_size=args.memoize,
+            template=template,
+            ast_cache_dir=args.ast_cache,
+        )
+        for error in result.errors:
+            print(format_error(error), file=sys.stderr)
+        print(
+            f"Built {len(result.built)} pages ({len(result.skipped)} already done,"
+            f" {len(result.errors)} failed)"
+        )
+        if result.errors:
+            sys.exit(1)
+        return
+    if not os.path.isdir(args.content):
+        print(f"No content directory '{args.content}', nothing to build.")
+        return
+    # The rebuilds of --watch use the same options as this build.
+    options = dict(
+        template_path=args.template,
+        static_paths=args.static,
+        manifest_path=args.manifest,
+        gzip_output=args.gzip,
+        search=args.search,
+        ast_cache_dir=args.ast_cache,
+        cache_dir=args.cache_dir,
+        memo_size=args.memoize,
+    )
+    if args.watch:
+        from watch import SiteWatcher
+
+        # Created before the full build so edits made during it are seen.
+        # An edit usually changes a page or two, too few to pay for a pool.
+        watcher = SiteWatcher(
+            args.content,
+            args.dest,
+            workers=args.workers or 1,
+            chunksize=args.chunksize,
+            **options,
+        )
+    profiling_on = args.profile or args.profile_passes or args.trace
+    profiler = profiling.Profiler() if profiling_on else None
+    start = time.perf_counter()
+    from sitebuild import build_site
+
+    build = build_site(
+        args.content,
+        args.dest,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        profiler=profiler,
+        profile_passes=args.profile_passes,
+        **options,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"Built {len(build.built)} pages from '{args.content}' into '{args.dest}'"
+        f" in {elapsed:.2f}s ({len(build.skipped)} unchanged); copied"
+        f" {len(build.copied)} static files ({len(build.unchanged)} unchanged)"
+    )
+    if profiler is not None:
+        print(profiler.report(top=args.profile or 10))
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+            print(f"Wrote trace to '{args.trace}'")
+    if args.watch:
+        print(f"Watching '{args.content}' for changes...")
+        try:
+            watcher.run(args.interval)
+        except KeyboardInterrupt:
+            pass
 
 
-main()
+if __name__ == "__main__":
+    main()
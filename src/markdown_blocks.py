@@ -1,2 +1,345 @@
+from __future__ import annotations
+
+import io
+import os
+from collections import namedtuple
+from collections.abc import Callable, Iterable, Iterator
+from enum import Enum
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from profiling import count, stage
+from textnode import TextNode, TextType, text_node_to_html_node
+
+# typing is only needed for annotations, which are never evaluated here.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import TextIO
+
+    from block_cache import BlockCache
+    from inline_cache import InlineMemo
+
+# Inline parsing used for the text of every block; swapped out by
+# use_inline_memo and by profiling.
+_text_to_textnodes = text_to_textnodes
+_text_node_to_html_node = text_node_to_html_node
+
+
+class BlockType(str, Enum):
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+    def __str__(self) -> str:
+        return self.value
+
+
 def markdown_to_blocks(markdown: str) -> list[str]:
-    return [block.strip() for block in markdown.split("\n\n") if block]
+    """
+    Split a document on blank lines. A ``` fenced code region is always a
+    block of its own, blank lines inside it included.
+    """
+    if "```" not in markdown:
+        blocks = (block.strip() for block in markdown.split("\n\n"))
+        return [block for block in blocks if block]
+    return list(_blocks_from_lines(io.StringIO(markdown)))
+
+
+def iter_markdown_blocks(source: str | os.PathLike | TextIO) -> Iterator[str]:
+    """
+    Yield the blocks of a markdown document one at a time, split the same
+    way as markdown_to_blocks.
+    source is either a path or an open text stream; only the lines of the
+    block currently being read are held in memory.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield from _blocks_from_lines(f)
+    else:
+        yield from _blocks_from_lines(source)
+
+
+def _blocks_from_lines(lines: Iterable[str]) -> Iterator[str]:
+    block_lines: list[str] = []
+    # Length of the opening fence of the code region being read, else 0.
+    fence = 0
+    for line in lines:
+        if fence:
+            block_lines.append(line)
+            if _is_closing_fence(line, fence):
+                fence = 0
+                yield "".join(block_lines).strip()
+                block_lines.clear()
+            continue
+        opening = _opening_fence_length(line) if line != "\n" else 0
+        if line == "\n" or opening:
+            if block_lines:
+                block = "".join(block_lines).strip()
+                block_lines.clear()
+                if block:
+                    yield block
+            if opening:
+                fence = opening
+                block_lines.append(line)
+            continue
+        block_lines.append(line)
+    if block_lines:
+        block = "".join(block_lines).strip()
+        if block:
+            yield block
+
+
+def _opening_fence_length(line: str) -> int:
+    """
+    The number of backticks of the code fence line opens, or 0 if it
+    doesn't open one. Like CommonMark, a backtick in the info string means
+    the line is inline code such as ```x```, not a fence.
+    """
+    stripped = line.strip()
+    info = stripped.lstrip("`")
+    length = len(stripped) - len(info)
+    return length if length >= 3 and "`" not in info else 0
+
+
+def _is_closing_fence(line: str, length: int) -> bool:
+    # Closes a fence opened with length backticks; it may be longer.
+    stripped = line.strip()
+    return len(stripped) >= length and not stripped.strip("`")
+
+
+def _fenced_code(block: str) -> str:
+    # The code of a CODE block: the opening fence line, which may name a
+    # language, and the closing fence are dropped.
+    fence = len(block) - len(block.lstrip("`"))
+    first_newline = block.find("\n")
+    if first_newline == -1:
+        return block[fence:-fence]
+    return block[first_newline + 1 : block.rfind("\n") + 1]
+
+
+def block_to_block_type(block: str) -> BlockType:
+    """
+    The first character picks the only block type that can apply, so each
+    line is looked at once, by that type's check alone.
+    """
+    first = block[:1]
+    if first == "#":
+        level = len(block) - len(block.lstrip("#"))
+        if level <= 6 and block[level : level + 1] == " ":
+            return BlockType.HEADING
+        return BlockType.PARAGRAPH
+    if first == "`":
+        # A closing fence at least as long as the opening one must end it.
+        fence = len(block) - len(block.lstrip("`"))
+        if fence < 3 or len(block) < 2 * fence:
+            return BlockType.PARAGRAPH
+        last_newline = block.rfind("\n")
+        if last_newline == -1:
+            closed = len(block) - len(block.rstrip("`")) >= fence
+        else:
+            closed = _is_closing_fence(block[last_newline + 1 :], fence)
+        return BlockType.CODE if closed else BlockType.PARAGRAPH
+    if first == ">":
+        for line in block.split("\n"):
+            if line[:1] != ">":
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if first == "*" or first == "-":
+        for line in block.split("\n"):
+            if line[1:2] != " " or (line[:1] != "*" and line[:1] != "-"):
+                return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+    if first == "1":
+        for i, line in enumerate(block.split("\n"), start=1):
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def extract_title(markdown: str) -> str | None:
+    """
+    The text of the first h1 heading, or None if there is none. Lines in
+    code blocks that start with "# " are not headings.
+    """
+    for block in markdown_to_blocks(markdown):
+        if block.startswith("# "):
+            return block[2:].split("\n", 1)[0].strip()
+    return None
+
+
+def inline_functions() -> tuple[Callable, Callable]:
+    """
+    The (text_to_textnodes, text_node_to_html_node) pair currently used for
+    the text of every block.
+    """
+    return _text_to_textnodes, _text_node_to_html_node
+
+
+def set_inline_functions(
+    to_textnodes: Callable[[str], list[TextNode]],
+    to_html_node: Callable[[TextNode], HTMLNode],
+) -> None:
+    global _text_to_textnodes, _text_node_to_html_node
+    _text_to_textnodes = to_textnodes
+    _text_node_to_html_node = to_html_node
+
+
+def use_inline_memo(memo: InlineMemo | None) -> None:
+    """
+    Route the inline parsing of all blocks through memo, or back to the
+    plain functions with None.
+    """
+    if memo is None:
+        set_inline_functions(text_to_textnodes, text_node_to_html_node)
+    else:
+        set_inline_functions(memo.text_to_textnodes, text_node_to_html_node)
+
+
+# A block parsed down to its inline TextNodes, with one list of them per
+# paragraph, heading, quote or list item. A code block has a single CODE
+# node holding its code. level is the heading level, 0 for other blocks.
+ParsedBlock = namedtuple("ParsedBlock", ["block_type", "level", "segments"])
+
+
+def parse_block(block: str) -> ParsedBlock:
+    """
+    Parse a block down to its TextNodes, which the converters below turn
+    into HTML nodes and which can be stored (see ast_cache.py) or read by
+    later build steps.
+    """
+    block_type = block_to_block_type(block)
+    if block_type == BlockType.HEADING:
+        level = len(block) - len(block.lstrip("#"))
+        return ParsedBlock(block_type, level, [_text_to_textnodes(block[level + 1 :])])
+    if block_type == BlockType.CODE:
+        # The code itself is never parsed as inline markdown.
+        code = _fenced_code(block)
+        return ParsedBlock(block_type, 0, [[TextNode(code, TextType.CODE)]])
+    lines = block.split("\n")
+    if block_type == BlockType.QUOTE:
+        texts = [" ".join(line[1:].lstrip() for line in lines)]
+    elif block_type == BlockType.UNORDERED_LIST:
+        texts = [line[2:] for line in lines]
+    elif block_type == BlockType.ORDERED_LIST:
+        texts = [line.split(". ", 1)[1] for line in lines]
+    else:
+        texts = [" ".join(lines)]
+    return ParsedBlock(block_type, 0, [_text_to_textnodes(text) for text in texts])
+
+
+def parse_markdown(markdown: str) -> list[ParsedBlock]:
+    with stage("markdown_to_blocks"):
+        blocks = [block for block in markdown_to_blocks(markdown) if block]
+    count("blocks", len(blocks))
+    return [parse_block(block) for block in blocks]
+
+
+def textnodes_to_children(nodes: Iterable[TextNode]) -> list[HTMLNode]:
+    children = [_text_node_to_html_node(node) for node in nodes]
+    # ParentNode needs at least one child, e.g. for an empty list item.
+    return children or [LeafNode(tag=None, value="")]
+
+
+def paragraph_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    return ParentNode(tag="p", children=textnodes_to_children(parsed.segments[0]))
+
+
+def heading_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    children = textnodes_to_children(parsed.segments[0])
+    return ParentNode(tag=f"h{parsed.level}", children=children)
+
+
+def code_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    code = parsed.segments[0][0].text
+    return ParentNode(tag="pre", children=[LeafNode(tag="code", value=code)])
+
+
+def quote_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    children = textnodes_to_children(parsed.segments[0])
+    return ParentNode(tag="blockquote", children=children)
+
+
+def _list_items(parsed: ParsedBlock) -> list[ParentNode]:
+    return [
+        ParentNode(tag="li", children=textnodes_to_children(segment))
+        for segment in parsed.segments
+    ]
+
+
+def unordered_list_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    return ParentNode(tag="ul", children=_list_items(parsed))
+
+
+def ordered_list_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    return ParentNode(tag="ol", children=_list_items(parsed))
+
+
+_BLOCK_CONVERTERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+
+def parsed_block_to_html_node(parsed: ParsedBlock) -> ParentNode:
+    return _BLOCK_CONVERTERS[parsed.block_type](parsed)
+
+
+def block_to_html_node(block: str) -> ParentNode:
+    return parsed_block_to_html_node(parse_block(block))
+
+
+def block_to_html(block: str) -> str:
+    node = block_to_html_node(block)
+    with stage("to_html"):
+        return node.to_html()
+
+
+def parsed_to_html(blocks: Iterable[ParsedBlock]) -> str:
+    """Render parsed blocks the same way markdown_to_html renders blocks."""
+    parts = []
+    for parsed in blocks:
+        node = parsed_block_to_html_node(parsed)
+        with stage("to_html"):
+            parts.append(node.to_html())
+    return f"<div>{''.join(parts)}</div>"
+
+
+def markdown_to_html_node(markdown: str) -> ParentNode:
+    children = [
+        block_to_html_node(block) for block in markdown_to_blocks(markdown) if block
+    ]
+    # An empty document is an empty div, as markdown_to_html renders it.
+    return ParentNode(tag="div", children=children or [LeafNode(tag=None, value="")])
+
+
+def markdown_to_html_chunks(source: str | os.PathLike | TextIO) -> Iterator[str]:
+    """
+    Stream a document from a path or text stream as HTML fragments. Blocks
+    are read, parsed and rendered one at a time, so memory stays bounded
+    by the largest block rather than the document.
+    """
+    blocks = (block_to_html_node(block) for block in iter_markdown_blocks(source))
+    return ParentNode(tag="div", children=blocks).to_html_chunks()
+
+
+def markdown_to_html(markdown: str, cache: BlockCache = None) -> str:
+    """
+    Render a whole document. With a cache, blocks whose rendered HTML is
+    already stored are not parsed again.
+    """
+    with stage("markdown_to_blocks"):
+        blocks = [block for block in markdown_to_blocks(markdown) if block]
+    count("blocks", len(blocks))
+    if cache is None:
+        parts = [block_to_html(block) for block in blocks]
+    else:
+        parts = [cache.render(block, block_to_html) for block in blocks]
+    return f"<div>{''.join(parts)}</div>"
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+import multiprocessing
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from gencontent import render_page
+from httputil import etag_for
+
+# The server of `server.py --preview`, kept out of server.py so it can be
+# tested without a socket.
+
+
+class RenderedPageCache:
+    """
+    Rendered HTML of .md files by path, holding at most max_bytes with the
+    least recently used pages dropped first. An entry remembers the mtime
+    and size of the source it was rendered from and is only returned for
+    those. Used from the event loop alone, so it takes no lock.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[tuple[int, int], bytes]] = OrderedDict()
+        self._size = 0
+
+    def get(self, path: str, stat_key: tuple[int, int]) -> bytes | None:
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if entry[0] != stat_key:
+            self._discard(path)
+            return None
+        self._entries.move_to_end(path)
+        return entry[1]
+
+    def put(self, path: str, stat_key: tuple[int, int], body: bytes) -> None:
+        self._discard(path)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[path] = (stat_key, body)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _discard(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+class PreviewServer:
+    """
+    asyncio server for previewing a content directory without building it.
+    A .md file, or the index.md of a directory, is rendered on its first
+    request with gencontent.render_page in a process pool, so a slow page
+    never holds up the connections served meanwhile. The HTML is kept in
+    a RenderedPageCache until its source changes. Requests for a page that
+    is already being rendered wait for that render instead of starting
+    another. Other files are served as they are.
+    An executor given to the constructor renders the pages instead of a
+    pool of its own, and is left running when serve returns.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        template: str = None,
+        workers: int = None,
+        cache_bytes: int = 32 * 1024 * 1024,
+        executor: Executor = None,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.template = template
+        self.workers = workers
+        self.cache = RenderedPageCache(cache_bytes)
+        self.renders = 0
+        self._executor = executor
+        # (path, stat key) -> task of the render in flight
+        self._pending: dict[tuple[str, tuple[int, int]], asyncio.Future] = {}
+
+    async def serve(self, host: str = "", port: int = 8888) -> None:
+        own_executor = self._executor is None
+        if own_executor:
+            # Spawned rather than forked: forking once the event loop has
+            # started its file reading threads can leave a worker deadlocked.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            server = await asyncio.start_server(self._handle, host, port)
+            async with server:
+                await server.serve_forever()
+        finally:
+            if own_executor:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    async def render(self, path: str, stat_key: tuple[int, int]) -> bytes:
+        """The rendered page at path, from the cache if it is current."""
+        body = self.cache.get(path, stat_key)
+        if body is not None:
+            return body
+        key = (path, stat_key)
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(path, stat_key))
+            self._pending[key] = task
+        # Shielded so a client that goes away doesn't cancel the render for
+        # everyone else waiting on it.
+        return await asyncio.shield(task)
+
+    async def _render(self, path: str, stat_key: tuple[int, int]) -> bytes:
+        try:
+            loop = asyncio.get_running_loop()
+            html = await loop.run_in_executor(
+                self._executor, render_page, path, None, self.template
+            )
+            self.renders += 1
+            body = html.encode("utf-8")
+            self.cache.put(path, stat_key, body)
+            return body
+        finally:
+            del self._pending[(path, stat_key)]
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    status, extra, body = HTTPStatus.BAD_REQUEST, [], b""
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, extra, body = await self._respond(method, target, headers)
+                    keep_alive = (
+                        version == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                        and method in ("GET", "HEAD")
+                    )
+                    if method == "HEAD" and body is not None:
+                        extra.append(("Content-Length", str(len(body))))
+                        body = None
+                if status >= 400 and not body and body is not None:
+                    body = f"{status.value} {status.phrase}\n".encode()
+                    extra.append(("Content-Type", "text/plain; charset=utf-8"))
+                out = [f"HTTP/1.1 {status.value} {status.phrase}"]
+                out += [f"{name}: {value}" for name, value in extra]
+                if body is not None:
+                    out.append(f"Content-Length: {len(body)}")
+                if not keep_alive:
+                    out.append("Connection: close")
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+                if body:
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, method: str, target: str, headers: dict[str, str]
+    ) -> tuple[HTTPStatus, list[tuple[str, str]], bytes | None]:
+        """Status, headers and body of the response; HEAD still gets a body."""
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, [("Allow", "GET, HEAD")], b""
+        url_path = urlsplit(target).path
+        try:
+            path = self._translate_path(url_path)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, [], b""
+        if path is None:
+            return HTTPStatus.NOT_FOUND, [], b""
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                location = [("Location", url_path + "/")]
+                return HTTPStatus.MOVED_PERMANENTLY, location, b""
+            for index in ("index.md", "index.html"):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return HTTPStatus.NOT_FOUND, [], b""
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return HTTPStatus.NOT_FOUND, [], b""
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        etag = etag_for(stat)
+        validators = [("ETag", etag), ("Cache-Control", "no-cache")]
+        if_none_match = headers.get("if-none-match", "").split(",")
+        if etag in [tag.strip() for tag in if_none_match]:
+            return HTTPStatus.NOT_MODIFIED, validators, None
+        if path.endswith(".md"):
+            content_type = "text/html; charset=utf-8"
+            try:
+                body = await self.render(path, stat_key)
+            except Exception as e:
+                print(f"Failed to render {path}: {e!r}", file=sys.stderr)
+                return HTTPStatus.INTERNAL_SERVER_ERROR, [], b""
+        else:
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            loop = asyncio.get_running_loop()
+            try:
+                body = await loop.run_in_executor(None, _read_file, path)
+            except OSError:
+                return HTTPStatus.NOT_FOUND, [], b""
+        return HTTPStatus.OK, [("Content-Type", content_type), *validators], body
+
+    def _translate_path(self, url_path: str) -> str | None:
+        """
+        The file url_path names, like SimpleHTTPRequestHandler.translate_path
+        but None for a path that would leave the served directory. Raises
+        ValueError for a path no file can have, one with a NUL byte in it.
+        """
+        path = unquote(url_path)
+        if "\x00" in path:
+            raise ValueError(f"NUL byte in path {url_path!r}")
+        parts = [part for part in path.split("/") if part not in ("", ".")]
+        if any(part == ".." or os.sep in part for part in parts):
+            return None
+        return os.path.join(self.directory, *parts)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
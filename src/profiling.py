@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+
+from htmlnode import HTMLNode
+from textnode import TextNode
+
+# The profiler of this process, if profiling was switched on with install.
+_profiler: Profiler = None
+# The inline functions markdown_blocks used before install wrapped them.
+_unwrapped: tuple[Callable, Callable] = None
+# The scan_inline helpers install wrapped for passes, by name.
+_unwrapped_helpers: dict[str, Callable] = {}
+_NOT_PROFILING = nullcontext()
+
+# The helpers scan_inline hands its work to, timed as stages of their own
+# with passes; the rest of its time is the scan itself.
+_SCAN_STAGES = (
+    ("_close_emphasis", "scan_inline emphasis"),
+    ("_find_code_close", "scan_inline code spans"),
+    ("_finish", "scan_inline finish"),
+)
+
+
+class DocumentProfile:
+    """
+    Timings of one page: wall time, seconds spent per stage, counters
+    such as nodes created, and the pid of the process that built it.
+    spans holds every timed call as (stage, start_ns, duration_ns), in
+    the order the calls finished, for the trace.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.pid = os.getpid()
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.stages: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.spans: list[tuple[str, int, int]] = []
+
+    def add_span(self, stage: str, start_ns: int, duration_ns: int) -> None:
+        self.spans.append((stage, start_ns, duration_ns))
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration_ns / 1e9
+
+    def add_count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.documents: list[DocumentProfile] = []
+        self._current: DocumentProfile = None
+
+    @contextmanager
+    def document(self, path: str) -> Iterator[DocumentProfile]:
+        profile = DocumentProfile(path)
+        self._current = profile
+        profile.start_ns = time.perf_counter_ns()
+        try:
+            yield profile
+        finally:
+            profile.duration_ns = time.perf_counter_ns() - profile.start_ns
+            self._current = None
+            self.documents.append(profile)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            if self._current is not None:
+                end = time.perf_counter_ns()
+                self._current.add_span(name, start, end - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self._current is not None:
+            self._current.add_count(name, n)
+
+    def report(self, top: int = 10) -> str:
+        totals: dict[str, float] = {}
+        for doc in self.documents:
+            for name, seconds in doc.stages.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        wall = sum(doc.duration_ns for doc in self.documents) / 1e9
+        lines = [f"{len(self.documents)} pages, {wall:.3f}s of page time"]
+        for name, seconds in sorted(totals.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:<32}{seconds * 1000:>10.1f} ms")
+        lines.append(f"Slowest {min(top, len(self.documents))} pages:")
+        slowest = sorted(self.documents, key=lambda doc: -doc.duration_ns)[:top]
+        for doc in slowest:
+            lines.append(f"  {doc.duration_ns / 1e6:>10.2f} ms  {doc.path}")
+            for name, seconds in sorted(doc.stages.items(), key=lambda kv: -kv[1]):
+                lines.append(f"      {name:<32}{seconds * 1000:>10.2f} ms")
+            counts = ", ".join(f"{k}={v}" for k, v in sorted(doc.counts.items()))
+            if counts:
+                lines.append(f"      {counts}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """
+        Trace-event JSON for chrome://tracing or Perfetto: a complete
+        event per page on the row of the process that built it, with its
+        counters as args, and within it a complete event for every timed
+        call of a stage, nested as the calls were.
+        """
+        origin = min((doc.start_ns for doc in self.documents), default=0)
+        events = []
+        for doc in self.documents:
+            events.append(
+                {
+                    "name": doc.path,
+                    "cat": "page",
+                    "ph": "X",
+                    "ts": (doc.start_ns - origin) / 1000,
+                    "dur": doc.duration_ns / 1000,
+                    "pid": doc.pid,
+                    "tid": doc.pid,
+                    "args": dict(doc.counts),
+                }
+            )
+            # Viewers nest complete events by time, and expect a parent to
+            # come before its children when they start together.
+            spans = sorted(doc.spans, key=lambda span: (span[1], -span[2]))
+            for name, start_ns, duration_ns in spans:
+                events.append(
+                    {
+                        "name": name,
+                        "cat": "stage",
+                        "ph": "X",
+                        "ts": (start_ns - origin) / 1000,
+                        "dur": duration_ns / 1000,
+                        "pid": doc.pid,
+                        "tid": doc.pid,
+                    }
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def active() -> Profiler | None:
+    return _profiler
+
+
+def stage(name: str):
+    """
+    Time the enclosed code as part of the current page's stage name; does
+    nothing unless profiling is on.
+    """
+    if _profiler is None:
+        return _NOT_PROFILING
+    return _profiler.stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+
+def install(profiler: Profiler | None, passes: bool = False) -> None:
+    """
+    Switch profiling on for this process, or off with None.
+    Inline parsing is timed by wrapping the functions markdown_blocks uses
+    for it, so nothing is paid while profiling is off. With passes the
+    helpers of inline_markdown.scan_inline are wrapped too, so that
+    matching emphasis, finding code spans and building the nodes get
+    timings of their own. The pages come out the same either way.
+    """
+    global _profiler, _unwrapped
+    # markdown_blocks imports this module for stage().
+    import inline_markdown
+    import markdown_blocks
+
+    if _profiler is not None:
+        markdown_blocks.set_inline_functions(*_unwrapped)
+        for name, func in _unwrapped_helpers.items():
+            setattr(inline_markdown, name, func)
+        _unwrapped_helpers.clear()
+    _profiler = profiler
+    if profiler is None:
+        return
+    _unwrapped = markdown_blocks.inline_functions()
+    to_textnodes, to_html_node = _unwrapped
+    markdown_blocks.set_inline_functions(
+        _timed_text_to_textnodes(profiler, to_textnodes),
+        _timed_text_node_to_html_node(profiler, to_html_node),
+    )
+    if passes:
+        for name, stage_name in _SCAN_STAGES:
+            func = getattr(inline_markdown, name)
+            _unwrapped_helpers[name] = func
+            setattr(inline_markdown, name, _timed(profiler, stage_name, func))
+
+
+def _timed(profiler: Profiler, stage_name: str, func: Callable) -> Callable:
+    perf_counter_ns = time.perf_counter_ns
+
+    def timed(*args):
+        start = perf_counter_ns()
+        result = func(*args)
+        doc = profiler._current
+        if doc is not None:
+            doc.add_span(stage_name, start, perf_counter_ns() - start)
+        return result
+
+    return timed
+
+
+def _timed_text_to_textnodes(profiler: Profiler, func: Callable) -> Callable:
+    perf_counter_ns = time.perf_counter_ns
+
+    def text_to_textnodes(text: str) -> list[TextNode]:
+        start = perf_counter_ns()
+        nodes = func(text)
+        doc = profiler._current
+        if doc is not None:
+            doc.add_span("text_to_textnodes", start, perf_counter_ns() - start)
+            doc.add_count("text_nodes", len(nodes))
+        return nodes
+
+    return text_to_textnodes
+
+
+def _timed_text_node_to_html_node(profiler: Profiler, func: Callable) -> Callable:
+    perf_counter_ns = time.perf_counter_ns
+
+    def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+        start = perf_counter_ns()
+        node = func(text_node)
+        doc = profiler._current
+        if doc is not None:
+            doc.add_span("text_node_to_html_node", start, perf_counter_ns() - start)
+            doc.add_count("html_nodes")
+        return node
+
+    return text_node_to_html_node
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections.abc import Callable, Iterable, Iterator
+
+from fileutil import write_atomic
+from markdown_blocks import BlockType, ParsedBlock, parse_markdown
+from textnode import TextNode, TextType, walk_nodes
+
+SEARCH_DIR = "search"
+DOCS_NAME = "docs.json"
+INDEX_FORMAT = 1
+# Terms are sharded by their first PREFIX_LENGTH characters, so a query
+# only maps the shards of its own terms.
+PREFIX_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+# A shard file is a header, a directory of fixed-size entries sorted by
+# term, the UTF-8 terms and the postings. Each entry holds the offset and
+# length of its term and of its postings, and the number of documents the
+# term occurs in. Postings are varint pairs of (doc id - previous doc id,
+# occurrences in the doc).
+_MAGIC = b"SIDX"
+_HEADER = struct.Struct("<4sII")
+_ENTRY = struct.Struct("<IIIII")
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        term
+        for term in _WORD_RE.findall(text.casefold())
+        if len(term) <= MAX_TERM_LENGTH
+    ]
+
+
+def page_text(blocks: Iterable[ParsedBlock]) -> Iterator[str]:
+    """
+    Yield the text of every TextNode of a parsed page, leaving out code
+    blocks, inline code and URLs.
+    """
+    for parsed in blocks:
+        if parsed.block_type == BlockType.CODE:
+            continue
+        for segment in parsed.segments:
+            yield from _node_text(segment)
+
+
+def _node_text(nodes: Iterable[TextNode]) -> Iterator[str]:
+    # Nested nodes keep their text in their children.
+    for node in walk_nodes(nodes):
+        if not node.children and node.text_type != TextType.CODE:
+            yield node.text
+
+
+def build_search_index(
+    documents: Iterable[tuple[str, str, str]],
+    directory: str,
+    prefix_length: int = PREFIX_LENGTH,
+    parse: Callable[[str], list[ParsedBlock]] = parse_markdown,
+) -> list[str]:
+    """
+    Index (url, title, markdown) documents into directory and return the
+    names of the files written. Doc ids are positions in documents.
+    parse turns markdown into parsed blocks, e.g. ASTCache.parse to reuse
+    the parse of the build.
+    Shards are written before the doc table that points into them, and
+    shards left from an earlier index are removed last.
+    """
+    docs = []
+    postings: dict[str, list[tuple[int, int]]] = {}
+    for doc_id, (url, title, markdown) in enumerate(documents):
+        docs.append([url, title])
+        counts: dict[str, int] = {}
+        for text in page_text(parse(markdown)):
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc_id, tf))
+
+    shards: dict[str, list[str]] = {}
+    for term in postings:
+        shards.setdefault(term[:prefix_length], []).append(term)
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for prefix, terms in shards.items():
+        name = shard_name(prefix)
+        data = _encode_shard(sorted(terms), postings)
+        write_atomic(os.path.join(directory, name), data)
+        written.append(name)
+    meta = {"format": INDEX_FORMAT, "prefix_length": prefix_length, "docs": docs}
+    write_atomic(os.path.join(directory, DOCS_NAME), json.dumps(meta).encode("utf-8"))
+    written.append(DOCS_NAME)
+    keep = set(written)
+    for name in os.listdir(directory):
+        if name.endswith(".idx") and name not in keep:
+            os.remove(os.path.join(directory, name))
+    return written
+
+
+def shard_name(prefix: str) -> str:
+    # Hex keeps any prefix, whatever its script, a safe file name.
+    return prefix.encode("utf-8").hex() + ".idx"
+
+
+def _encode_shard(
+    terms: list[str], postings: dict[str, list[tuple[int, int]]]
+) -> bytes:
+    encoded_terms = [term.encode("utf-8") for term in terms]
+    # Sorted by UTF-8 bytes, the order lookups compare in.
+    order = sorted(range(len(terms)), key=lambda i: encoded_terms[i])
+    encoded_postings = [_encode_postings(postings[terms[i]]) for i in order]
+    term_offset = _HEADER.size + _ENTRY.size * len(terms)
+    postings_offset = term_offset + sum(len(t) for t in encoded_terms)
+    out = bytearray(_HEADER.pack(_MAGIC, INDEX_FORMAT, len(terms)))
+    for i, data in zip(order, encoded_postings):
+        term = encoded_terms[i]
+        out += _ENTRY.pack(
+            term_offset,
+            len(term),
+            postings_offset,
+            len(data),
+            len(postings[terms[i]]),
+        )
+        term_offset += len(term)
+        postings_offset += len(data)
+    for i in order:
+        out += encoded_terms[i]
+    for data in encoded_postings:
+        out += data
+    return bytes(out)
+
+
+def _encode_postings(doc_postings: list[tuple[int, int]]) -> bytes:
+    out = bytearray()
+    previous = 0
+    for doc_id, tf in doc_postings:
+        for value in (doc_id - previous, tf):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc_id
+    return bytes(out)
+
+
+def _decode_postings(data: bytes) -> list[tuple[int, int]]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    postings = []
+    doc_id = 0
+    for i in range(0, len(values), 2):
+        doc_id += values[i]
+        postings.append((doc_id, values[i + 1]))
+    return postings
+
+
+class SearchIndex:
+    """
+    Queries an index written by build_search_index. Shards are memory
+    mapped when a query first needs them and looked up by binary search
+    over their term directory, so only the pages of the terms asked for
+    are read. Files replaced by a rebuild are mapped again on next use.
+    Safe to share between threads.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._docs: list[list[str]] = []
+        self._prefix_length = PREFIX_LENGTH
+        self._docs_stat = None
+        # shard name -> (stat key of the mapped file, mmap)
+        self._shards: dict[str, tuple[tuple[int, int], mmap.mmap]] = {}
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Pages containing every term of query, best first, as dicts with
+        url, title and score (the sum of tf * idf over the terms).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        docs = self._load_docs()
+        scores: dict[int, float] | None = None
+        for term in terms:
+            postings = self.lookup(term)
+            if not postings:
+                return []
+            idf = math.log(1 + len(docs) / len(postings))
+            if scores is None:
+                scores = {doc_id: tf * idf for doc_id, tf in postings}
+            else:
+                scores = {
+                    doc_id: scores[doc_id] + tf * idf
+                    for doc_id, tf in postings
+                    if doc_id in scores
+                }
+            if not scores:
+                return []
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {"url": docs[doc_id][0], "title": docs[doc_id][1], "score": score}
+            for doc_id, score in best[:limit]
+            if doc_id < len(docs)
+        ]
+
+    def lookup(self, term: str) -> list[tuple[int, int]]:
+        """The (doc id, occurrences) postings of one normalized term."""
+        self._load_docs()
+        data = self._shard(shard_name(term[: self._prefix_length]))
+        if data is None:
+            return []
+        key = term.encode("utf-8")
+        lo, hi = 0, _HEADER.unpack_from(data, 0)[2]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = _ENTRY.unpack_from(data, _HEADER.size + mid * _ENTRY.size)
+            candidate = data[entry[0] : entry[0] + entry[1]]
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return _decode_postings(data[entry[2] : entry[2] + entry[3]])
+        return []
+
+    def close(self) -> None:
+        with self._lock:
+            for _, data in self._shards.values():
+                data.close()
+            self._shards.clear()
+
+    def _load_docs(self) -> list[list[str]]:
+        path = os.path.join(self.directory, DOCS_NAME)
+        stat_key = _stat_key(path)
+        with self._lock:
+            if stat_key != self._docs_stat:
+                if stat_key is None:
+                    self._docs = []
+                else:
+                    with open(path, encoding="utf-8") as f:
+                        meta = json.load(f)
+                    if meta.get("format") != INDEX_FORMAT:
+                        raise ValueError(f"Unsupported search index format in {path}")
+                    self._docs = meta["docs"]
+                    self._prefix_length = meta["prefix_length"]
+                self._docs_stat = stat_key
+            return self._docs
+
+    def _shard(self, name: str) -> mmap.mmap | None:
+        path = os.path.join(self.directory, name)
+        stat_key = _stat_key(path)
+        with self._lock:
+            cached = self._shards.get(name)
+            if cached is not None and cached[0] == stat_key:
+                return cached[1]
+            # A replaced mapping is dropped rather than closed, since a lookup
+            # in another thread may still be reading it; it is unmapped once
+            # nothing refers to it.
+            if stat_key is None:
+                self._shards.pop(name, None)
+                return None
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if data[:4] != _MAGIC:
+                data.close()
+                raise ValueError(f"{path} is not a search index shard")
+            self._shards[name] = (stat_key, data)
+            return data
+
+
+def _stat_key(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
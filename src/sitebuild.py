@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from collections import namedtuple
+
+from ast_cache import ASTCache
+from block_cache import parser_version
+from fileutil import write_atomic
+from gencontent import find_pages, generate_pages
+from markdown_blocks import extract_title, parse_markdown
+from search_index import SEARCH_DIR, build_search_index
+
+# Only needed for annotations, which are never evaluated here.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from batch import DocumentError
+
+MANIFEST_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+# Paths relative to dest_dir of the pages and static files a build wrote,
+# and of those it left alone because their sources had not changed.
+SiteBuild = namedtuple("SiteBuild", ["built", "skipped", "copied", "unchanged"])
+
+
+def build_site(
+    content_dir: str,
+    dest_dir: str,
+    template_path: str = None,
+    static_paths: list[str] = (),
+    manifest_path: str = None,
+    gzip_output: bool = False,
+    search: bool = False,
+    ast_cache_dir: str = None,
+    rebuild_all: bool = False,
+    **options,
+) -> SiteBuild:
+    """
+    Render every page under content_dir into the template at
+    template_path, copy the static files and directories in static_paths
+    into dest_dir, and write a manifest (by default dest_dir/manifest.json).
+
+    The manifest maps every output, relative to dest_dir, to the hash of
+    its source and of the output itself. A page whose source hash is the
+    one recorded by the previous build is not rendered again, as long as
+    the template, the parser and gzip_output are unchanged too, and
+    rebuild_all is not set. Outputs recorded by the previous build whose
+    source is gone are removed.
+    With search, a search index of all pages is written to
+    dest_dir/search (see search_index.py) whenever any page changed.
+    With an ast_cache_dir, pages are rendered from parsed blocks kept in an
+    ASTCache there, and the search index reads them back from it instead
+    of parsing every page again.
+    The remaining options are those of gencontent.generate_pages. With
+    keep_going, a page that fails is left out of built and keeps the
+    manifest entry of the previous build, so the next build tries it again.
+    """
+    if manifest_path is None:
+        manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+    template = None
+    if template_path is not None:
+        with open(template_path, encoding="utf-8") as f:
+            template = f.read()
+    key = build_key(template, gzip_output)
+    previous = load_manifest(manifest_path)
+    if rebuild_all or previous.get("build") != key:
+        previous_pages = {}
+    else:
+        previous_pages = previous.get("pages", {})
+
+    pages = {}
+    to_build = []
+    skipped = []
+    for from_path, dest_path in find_pages(content_dir, dest_dir):
+        rel_path = _rel(dest_path, dest_dir)
+        source_hash = file_digest(from_path)
+        entry = previous_pages.get(rel_path)
+        if (
+            entry is not None
+            and entry["source_hash"] == source_hash
+            and os.path.exists(dest_path)
+            and (not gzip_output or os.path.exists(dest_path + ".gz"))
+        ):
+            pages[rel_path] = entry
+            skipped.append(rel_path)
+            continue
+        pages[rel_path] = {
+            "source": _rel(from_path, content_dir),
+            "source_hash": source_hash,
+        }
+        to_build.append((from_path, dest_path))
+    failed = set()
+    on_page = options.pop("on_page", None)
+
+    def record_page(page: tuple[str, str], error: DocumentError | None) -> None:
+        if error is not None:
+            failed.add(page[1])
+        if on_page is not None:
+            on_page(page, error)
+
+    generate_pages(
+        to_build,
+        gzip_output=gzip_output,
+        template=template,
+        ast_cache_dir=ast_cache_dir,
+        on_page=record_page,
+        **options,
+    )
+    built = []
+    failed_pages = set()
+    for _, dest_path in to_build:
+        rel_path = _rel(dest_path, dest_dir)
+        if dest_path in failed:
+            failed_pages.add(rel_path)
+            if rel_path in previous_pages:
+                pages[rel_path] = previous_pages[rel_path]
+            else:
+                del pages[rel_path]
+            continue
+        pages[rel_path]["output_hash"] = file_digest(dest_path)
+        built.append(rel_path)
+
+    static = {}
+    copied = []
+    unchanged = []
+    previous_static = previous.get("static", {})
+    for static_path in static_paths:
+        for from_path, dest_path in find_static_files(static_path, dest_dir):
+            rel_path = _rel(dest_path, dest_dir)
+            entry, was_copied = copy_if_changed(
+                from_path, dest_path, previous_static.get(rel_path)
+            )
+            static[rel_path] = entry
+            (copied if was_copied else unchanged).append(rel_path)
+
+    search_files = {}
+    if search:
+        search_files = _update_search_index(
+            pages,
+            failed_pages,
+            content_dir,
+            dest_dir,
+            previous,
+            bool(built),
+            ast_cache_dir,
+        )
+
+    outputs = (("pages", pages), ("static", static), ("search", search_files))
+    for section, current in outputs:
+        for rel_path in previous.get(section, {}):
+            if rel_path not in current:
+                _remove_output(os.path.join(dest_dir, rel_path))
+    write_manifest(
+        manifest_path,
+        {
+            "format": MANIFEST_FORMAT,
+            "build": key,
+            "pages": pages,
+            "static": static,
+            "search": search_files,
+        },
+    )
+    return SiteBuild(built, skipped, copied, unchanged)
+
+
+def find_static_files(static_path: str, dest_dir: str) -> list[tuple[str, str]]:
+    """
+    Pair a static file with dest_dir/<its name>, or every file under a
+    static directory with the same path under dest_dir.
+    """
+    if not os.path.isdir(static_path):
+        return [(static_path, os.path.join(dest_dir, os.path.basename(static_path)))]
+    files = []
+    for root, dirs, names in os.walk(static_path):
+        dirs.sort()
+        for name in sorted(names):
+            from_path = os.path.join(root, name)
+            rel_path = os.path.relpath(from_path, static_path)
+            files.append((from_path, os.path.join(dest_dir, rel_path)))
+    return files
+
+
+def copy_if_changed(
+    from_path: str, dest_path: str, previous: dict | None = None
+) -> tuple[dict, bool]:
+    """
+    Copy from_path to dest_path unless dest_path already has the same
+    content, and return the file's manifest entry and whether it was
+    copied. Sizes are compared first; equal sizes and mtimes count as
+    unchanged, and only equal sizes with differing mtimes are hashed.
+    previous is the entry of the last build, whose hash is reused when the
+    file has not changed since.
+    """
+    source = os.stat(from_path)
+    try:
+        dest = os.stat(dest_path)
+    except FileNotFoundError:
+        dest = None
+    entry = {
+        "source": from_path,
+        "size": source.st_size,
+        "mtime_ns": source.st_mtime_ns,
+    }
+    if dest is not None and dest.st_size == source.st_size:
+        if dest.st_mtime_ns == source.st_mtime_ns:
+            if (
+                previous is not None
+                and previous.get("size") == source.st_size
+                and previous.get("mtime_ns") == source.st_mtime_ns
+            ):
+                entry["source_hash"] = entry["output_hash"] = previous["source_hash"]
+            else:
+                entry["source_hash"] = entry["output_hash"] = file_digest(from_path)
+            return entry, False
+        digest = file_digest(from_path)
+        if digest == file_digest(dest_path):
+            # Line the mtimes up so the next build skips the hashing.
+            shutil.copystat(from_path, dest_path)
+            entry["source_hash"] = entry["output_hash"] = digest
+            return entry, False
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    shutil.copy2(from_path, dest_path)
+    entry["source_hash"] = entry["output_hash"] = file_digest(dest_path)
+    return entry, True
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str) -> dict:
+    """
+    The manifest at path, or an empty one if it is missing, unreadable or
+    of another format.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return {}
+    return manifest
+
+
+def write_manifest(path: str, manifest: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Written atomically so a deploy never reads half a manifest.
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    write_atomic(path, text.encode("utf-8"))
+
+
+def _update_search_index(
+    pages: dict,
+    failed_pages: set[str],
+    content_dir: str,
+    dest_dir: str,
+    previous: dict,
+    rebuild: bool,
+    ast_cache_dir: str | None,
+) -> dict:
+    # Every page goes into the index, so it is written again whenever a
+    # page was built, added or removed, or a file of it went missing.
+    # Pages that just failed to build are left out, as their source may
+    # not even be readable.
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    files = previous.get("search", {})
+    if (
+        not rebuild
+        and files
+        and pages.keys() == previous.get("pages", {}).keys()
+        and all(os.path.exists(os.path.join(dest_dir, path)) for path in files)
+    ):
+        return files
+
+    def documents():
+        for rel_path, entry in pages.items():
+            if rel_path in failed_pages:
+                continue
+            from_path = os.path.join(content_dir, entry["source"])
+            with open(from_path, encoding="utf-8") as f:
+                markdown = f.read()
+            title = extract_title(markdown)
+            if title is None:
+                title = os.path.splitext(os.path.basename(rel_path))[0]
+            yield "/" + rel_path, title, markdown
+
+    parse = ASTCache(ast_cache_dir).parse if ast_cache_dir else parse_markdown
+    files = {}
+    for name in build_search_index(documents(), search_dir, parse=parse):
+        path = os.path.join(search_dir, name)
+        files[_rel(path, dest_dir)] = {"output_hash": file_digest(path)}
+    return files
+
+
+def build_key(template: str | None, gzip_output: bool) -> str:
+    # Anything that changes every page: the parser, the template and
+    # whether pages are also gzipped.
+    digest = hashlib.sha256(parser_version().encode())
+    digest.update(b"gzip" if gzip_output else b"plain")
+    if template is not None:
+        digest.update(template.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _rel(path: str, start: str) -> str:
+    return os.path.relpath(path, start).replace(os.sep, "/")
+
+
+def _remove_output(path: str) -> None:
+    for stale in (path, path + ".gz"):
+        if os.path.exists(stale):
+            os.remove(stale)
@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+from array import array
+
+from ast_cache import AST_FORMAT, _HEADER, ASTCache, decode_blocks, encode_blocks
+from fixtures import TempDirTestCase
+from markdown_blocks import BlockType, ParsedBlock, parse_markdown, parsed_to_html
+from textnode import TextNode, TextType
+
+MARKDOWN = (
+    "# Héllo *there*\n\n"
+    "Some **bold *and* italic**, a [link](https://boot.dev) and ![img](a.png) `code`\n\n"
+    "- one\n- \n\n"
+    "1. first\n2. second\n\n"
+    "> quoted\n> text\n\n"
+    "```py\nx < 1\n\n```"
+)
+
+
+class TestEncodeBlocks(unittest.TestCase):
+    def test_round_trip(self):
+        blocks = parse_markdown(MARKDOWN)
+        self.assertEqual(blocks, decode_blocks(encode_blocks(blocks)))
+
+    def test_decoded_blocks_render_the_same(self):
+        decoded = decode_blocks(encode_blocks(parse_markdown(MARKDOWN)))
+        expected = parsed_to_html(parse_markdown(MARKDOWN))
+        self.assertEqual(expected, parsed_to_html(decoded))
+
+    def test_types_and_none_urls(self):
+        decoded = decode_blocks(encode_blocks(parse_markdown("a [b](c)")))
+        self.assertEqual(BlockType.PARAGRAPH, decoded[0].block_type)
+        first, link = decoded[0].segments[0]
+        self.assertIs(TextType.TEXT, first.text_type)
+        self.assertIsNone(first.url)
+        self.assertEqual(TextNode("b", TextType.LINK, "c"), link)
+
+    def test_strings_are_shared(self):
+        decoded = decode_blocks(encode_blocks(parse_markdown("**x** *x* x")))
+        bold, _, italic, _ = decoded[0].segments[0]
+        self.assertIs(bold.text, italic.text)
+
+    def test_deeply_nested_round_trip(self):
+        blocks = parse_markdown("*a **b " * 1500 + "c*" * 1500)
+        self.assertEqual(blocks, decode_blocks(encode_blocks(blocks)))
+
+    def test_many_strings(self):
+        nodes = [TextNode(str(i), TextType.BOLD) for i in range(70000)]
+        blocks = [ParsedBlock(BlockType.PARAGRAPH, 0, [nodes])]
+        data = encode_blocks(blocks)
+        self.assertEqual(4, _HEADER.unpack_from(data, 0)[3])
+        self.assertEqual(blocks, decode_blocks(data))
+
+    def test_other_byte_order(self):
+        blocks = parse_markdown(MARKDOWN)
+        data = bytearray(encode_blocks(blocks))
+        fields = list(_HEADER.unpack_from(data, 0))
+        strings, ints, width = fields[4], fields[5], fields[3]
+        offset = _HEADER.size
+        for count, itemsize in ((strings, 4), (ints, width)):
+            values = array("H" if itemsize == 2 else "I")
+            values.frombytes(data[offset : offset + count * itemsize])
+            values.byteswap()
+            data[offset : offset + count * itemsize] = values.tobytes()
+            offset += count * itemsize
+        fields[2] = 1 if sys.byteorder == "little" else 0
+        _HEADER.pack_into(data, 0, *fields)
+        self.assertEqual(blocks, decode_blocks(bytes(data)))
+
+    def test_not_an_encoded_document(self):
+        with self.assertRaises(ValueError):
+            decode_blocks(b"<div></div>" + bytes(16))
+
+
+class TestASTCache(TempDirTestCase):
+    def test_parse_stores_and_reuses(self):
+        directory = self.tmp.name
+        cache = ASTCache(directory, version="1")
+        blocks = cache.parse(MARKDOWN)
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        self.assertEqual(blocks, ASTCache(directory, version="1").parse(MARKDOWN))
+        self.assertIsNone(ASTCache(directory, version="2").get(MARKDOWN))
+
+    def test_version_includes_the_encoding_format(self):
+        self.assertEqual(
+            f"1 ast {AST_FORMAT}", ASTCache(self.tmp.name, version="1").version
+        )
+
+    def test_undecodable_entry_is_a_miss(self):
+        cache = ASTCache(self.tmp.name, version="1")
+        path = cache._path(MARKDOWN)
+        for data in [b"", b"MAST" + bytes(40), encode_blocks([])[:-1] + b"\xff"]:
+            with self.subTest(data=data):
+                self.write(path, data)
+                self.assertIsNone(cache.get(MARKDOWN))
+                self.assertFalse(os.path.exists(path))
+        self.assertEqual((0, 3), (cache.hits, cache.misses))
+        self.assertEqual(parse_markdown(MARKDOWN), cache.parse(MARKDOWN))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import os
+import pickle
+import unittest
+
+from batch import format_error, load_checkpoint, locate_error, run_batch
+from fixtures import TempDirTestCase
+from inline_markdown import MarkdownSyntaxError, text_to_textnodes
+from markdown_blocks import inline_functions, set_inline_functions
+
+
+class TestRunBatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pages = []
+        for name, data in [
+            ("a", b"# A\n\nfine"),
+            ("bad", b"# Bad\n\nfine\nthen \xff here"),
+            ("c", b"also *fine*"),
+        ]:
+            from_path = self.write(name + ".md", data)
+            self.pages.append((from_path, os.path.join(self.dest, name + ".html")))
+        self.checkpoint = os.path.join(self.tmp.name, "batch.checkpoint")
+
+    def entries(self):
+        with open(self.checkpoint, encoding="utf-8") as f:
+            key = json.loads(f.readline())["build"]
+        return load_checkpoint(self.checkpoint, key)
+
+    def test_errors_do_not_stop_the_batch(self):
+        report = os.path.join(self.tmp.name, "report.json")
+        result = run_batch(self.pages, report_path=report, workers=1)
+        self.assertEqual([self.pages[0][0], self.pages[2][0]], result.built)
+        self.assertTrue(os.path.exists(self.pages[2][1]))
+        [error] = result.errors
+        self.assertEqual((self.pages[1][0], 4, 6), error[:1] + error[2:4])
+        self.assertEqual("UnicodeDecodeError", error.error)
+        self.assertTrue(format_error(error).startswith(self.pages[1][0] + ":4:6: "))
+        with open(report, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual((2, 1), (data["built"], data["failed"]))
+        self.assertEqual(4, data["errors"][0]["line"])
+
+    def test_errors_in_pool_workers(self):
+        result = run_batch(self.pages, workers=2, chunksize=1)
+        self.assertEqual(2, len(result.built))
+        self.assertEqual([(4, 6)], [error[2:4] for error in result.errors])
+
+    def test_missing_source(self):
+        missing = (os.path.join(self.tmp.name, "gone.md"), self.pages[0][1])
+        [error] = run_batch([missing], workers=1).errors
+        self.assertEqual((None, None), error[2:4])
+        self.assertEqual(format_error(error).split(":")[0], missing[0])
+
+    def test_resume_from_checkpoint(self):
+        first = run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        self.assertEqual(1, len(first.errors))
+        self.assertEqual({self.pages[0][0], self.pages[2][0]}, set(self.entries()))
+
+        self.write(self.pages[1][0], "# Bad\n\nfixed")
+        second = run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        self.assertEqual([self.pages[1][0]], second.built)
+        self.assertEqual([self.pages[0][0], self.pages[2][0]], second.skipped)
+        self.assertEqual([], second.errors)
+        # Nothing is left to resume.
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_changed_page_is_not_skipped(self):
+        run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        with open(self.pages[0][0], "ab") as f:
+            f.write(b"\n\nmore")
+        result = run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        self.assertEqual([self.pages[2][0]], result.skipped)
+
+    def test_checkpoint_of_other_options_is_ignored(self):
+        run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        result = run_batch(
+            self.pages,
+            checkpoint_path=self.checkpoint,
+            workers=1,
+            template="{{ Content }}",
+        )
+        self.assertEqual([], result.skipped)
+
+    def test_truncated_checkpoint_line(self):
+        run_batch(self.pages, checkpoint_path=self.checkpoint, workers=1)
+        with open(self.checkpoint, "a", encoding="utf-8") as f:
+            f.write('{"source": "c.m')
+        self.assertEqual(2, len(self.entries()))
+
+
+class TestLocateError(unittest.TestCase):
+    def test_unclosed_delimiter(self):
+        markdown = "# Title\n\nSome text\nwith **bold and\n\n- more"
+        with self.assertRaises(MarkdownSyntaxError) as raised:
+            text_to_textnodes("Some text with **bold and", single_pass=False)
+        self.assertEqual((4, 6), locate_error(markdown.encode(), raised.exception))
+
+    def test_other_errors_point_at_their_block(self):
+        markdown = "ok\n\n1. one\n2. two\n\n> fine"
+        original = inline_functions()
+
+        def fail_on_two(text):
+            if text == "two":
+                raise ValueError("bad item")
+            return original[0](text)
+
+        set_inline_functions(fail_on_two, original[1])
+        try:
+            location = locate_error(markdown.encode(), ValueError("bad item"))
+        finally:
+            set_inline_functions(*original)
+        self.assertEqual((3, 1), location)
+
+    def test_error_survives_pickling(self):
+        error = MarkdownSyntaxError("No closing", "a ** b", 2)
+        copy = pickle.loads(pickle.dumps(error))
+        self.assertEqual(
+            ("No closing", "a ** b", 2), (str(copy), copy.text, copy.offset)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
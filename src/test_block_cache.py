@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from block_cache import BlockCache
+from fixtures import TempDirTestCase
+from markdown_blocks import block_to_html, markdown_to_html
+
+
+class TestBlockCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = self.tmp.name
+
+    def test_get_missing_block_returns_none(self):
+        cache = BlockCache(self.directory, version="1")
+        self.assertIsNone(cache.get("This is a paragraph"))
+        self.assertEqual(1, cache.misses)
+
+    def test_put_then_get(self):
+        cache = BlockCache(self.directory, version="1")
+        cache.put("This is a paragraph", "<p>This is a paragraph</p>")
+        self.assertEqual(
+            "<p>This is a paragraph</p>", cache.get("This is a paragraph")
+        )
+        self.assertEqual(1, cache.hits)
+
+    def test_entries_persist_between_instances(self):
+        BlockCache(self.directory, version="1").put("block", "<p>block</p>")
+        self.assertEqual(
+            "<p>block</p>", BlockCache(self.directory, version="1").get("block")
+        )
+
+    def test_version_change_drops_entries(self):
+        BlockCache(self.directory, version="1").put("block", "<p>block</p>")
+        self.assertIsNone(BlockCache(self.directory, version="2").get("block"))
+
+    def test_render_only_renders_changed_blocks(self):
+        rendered = []
+
+        def render(block):
+            rendered.append(block)
+            return block_to_html(block)
+
+        cache = BlockCache(self.directory, version="1")
+        for block in ["first", "second", "third"]:
+            cache.render(block, render)
+        for block in ["first", "second edited", "third"]:
+            cache.render(block, render)
+        self.assertEqual(["first", "second", "third", "second edited"], rendered)
+
+    def test_prune_evicts_least_recently_used(self):
+        cache = BlockCache(self.directory, max_bytes=10**6, version="1")
+        for i, block in enumerate(["old", "used", "new"]):
+            cache.put(block, "x" * 100)
+            os.utime(cache._path(block), (1000 + i, 1000 + i))
+        # Touch "old" so that "used" becomes the least recently used entry.
+        cache.get("old")
+        cache.max_bytes = 250
+        cache.prune()
+        self.assertIsNone(cache.get("used"))
+        self.assertIsNotNone(cache.get("old"))
+
+    def test_overwriting_an_entry_does_not_grow_the_size(self):
+        cache = BlockCache(self.directory, max_bytes=250, version="1")
+        cache.put("block", "x" * 100)
+        cache.put("block", "x" * 100)
+        self.assertEqual(100, cache._size)
+        self.assertIsNotNone(cache.get("block"))
+
+    def test_evictions_by_other_processes_are_noticed(self):
+        cache = BlockCache(self.directory, max_bytes=250, version="1")
+        cache.put("first", "x" * 100)
+        cache.put("second", "x" * 100)
+        # Another process evicts "first"; this one still counts its bytes.
+        os.remove(cache._path("first"))
+        cache.put("third", "x" * 100)
+        self.assertEqual(200, cache._size)
+        self.assertIsNotNone(cache.get("second"))
+
+    def test_markdown_to_html_with_cache_matches_without(self):
+        markdown = "This is **bold**\n\nAnd a [link](https://www.boot.dev)"
+        cache = BlockCache(self.directory, version="1")
+        self.assertEqual(markdown_to_html(markdown), markdown_to_html(markdown, cache))
+        self.assertEqual(markdown_to_html(markdown), markdown_to_html(markdown, cache))
+        self.assertEqual(2, cache.hits)
+
+
+if __name__ == "__main__":
+    unittest.main()
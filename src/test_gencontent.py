@@ -0,0 +1,94 @@
+import gzip
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import (
+    fill_template,
+    find_pages,
+    generate_pages,
+    generate_pages_recursive,
+)
+from markdown_blocks import inline_functions
+
+
+class TestGenerateContent(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "This is **bold**\n\nAnd *italic*")
+        self.write("content/blog/post.md", "A [link](https://www.boot.dev)")
+        self.write("content/blog/notes.txt", "not markdown")
+
+    def test_find_pages(self):
+        self.assertEqual(
+            [
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.dest, "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "blog", "post.md"),
+                    os.path.join(self.dest, "blog", "post.html"),
+                ),
+            ],
+            find_pages(self.content, self.dest),
+        )
+
+    def test_generate_pages_in_process(self):
+        count = generate_pages_recursive(self.content, self.dest, workers=1)
+        self.assertEqual(2, count)
+        self.assertEqual(
+            "<div><p>This is <b>bold</b></p><p>And <i>italic</i></p></div>",
+            self.read("index.html"),
+        )
+        self.assertEqual(
+            '<div><p>A <a href="https://www.boot.dev">link</a></p></div>',
+            self.read(os.path.join("blog", "post.html")),
+        )
+
+    def test_generate_pages_in_process_restores_inline_functions(self):
+        before = inline_functions()
+        generate_pages_recursive(self.content, self.dest, workers=1, memo_size=8)
+        self.assertEqual(before, inline_functions())
+        self.write("content/bad.md", b"\xff")
+        with self.assertRaises(UnicodeDecodeError):
+            generate_pages_recursive(self.content, self.dest, workers=1, memo_size=8)
+        self.assertEqual(before, inline_functions())
+
+    def test_generate_pages_with_pool_and_cache(self):
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        generate_pages_recursive(
+            self.content, self.dest, workers=2, chunksize=1, cache_dir=cache_dir
+        )
+        self.assertEqual(
+            "<div><p>This is <b>bold</b></p><p>And <i>italic</i></p></div>",
+            self.read("index.html"),
+        )
+        self.assertTrue(os.path.exists(os.path.join(cache_dir, "VERSION")))
+
+    def test_generate_pages_with_gzip(self):
+        generate_pages_recursive(self.content, self.dest, workers=1, gzip_output=True)
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            compressed = f.read()
+        self.assertEqual(self.read("index.html"), gzip.decompress(compressed).decode())
+
+    def test_generate_pages_from_pairs(self):
+        from_path = os.path.join(self.content, "blog", "post.md")
+        pages = [(from_path, os.path.join(self.dest, "a.html"))]
+        self.assertEqual(1, generate_pages(pages, workers=1))
+        self.assertEqual(
+            '<div><p>A <a href="https://www.boot.dev">link</a></p></div>',
+            self.read("a.html"),
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_fill_template(self):
+        template = "<title>{{ Title }}</title>{{ Content }}"
+        self.assertEqual(
+            "<title>A &amp; B</title><p>x</p>",
+            fill_template(template, "A & B", "<p>x</p>"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_html, write_html
+from textnode import TextNode, text_node_to_html_node, text_type_link
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -18,6 +20,32 @@ class TestHTMLNode(unittest.TestCase):
             ' href="https://www.google.com" target="_blank"', node.props_to_html()
         )
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode(props={"title": 'Tom & "Jerry" <3'})
+        self.assertEqual(
+            ' title="Tom &amp; &quot;Jerry&quot; &lt;3"', node.props_to_html()
+        )
+
+    def test_props_to_html_values_that_are_not_strings(self):
+        self.assertEqual(' width="100"', HTMLNode(props={"width": 100}).props_to_html())
+        self.assertEqual(' x="True"', HTMLNode(props={"x": True}).props_to_html())
+        self.assertEqual(' x="1"', HTMLNode(props={"x": 1}).props_to_html())
+        link = text_node_to_html_node(TextNode("x", text_type_link))
+        self.assertEqual('<a href="None">x</a>', link.to_html())
+
+    def test_props_to_html_same_props_twice(self):
+        first = HTMLNode(props={"class": "link"}).props_to_html()
+        self.assertEqual(first, HTMLNode(props={"class": "link"}).props_to_html())
+        self.assertEqual(
+            ' class="button"', HTMLNode(props={"class": "button"}).props_to_html()
+        )
+
+    def test_escape_html(self):
+        self.assertEqual("plain text", escape_html("plain text"))
+        self.assertEqual("a &lt; b &amp;&amp; c", escape_html("a < b && c"))
+        self.assertEqual("it's", escape_html("it's", quote=False))
+        self.assertEqual("it&#x27;s", escape_html("it's"))
+
 
 class TestLeafNode(unittest.TestCase):
     def test_to_html_no_value_should_raise_value_error(self):
@@ -40,6 +68,12 @@ class TestLeafNode(unittest.TestCase):
             '<a href="https://www.google.com">Click me!</a>', node.to_html()
         )
 
+    def test_to_html_escapes_value(self):
+        node = LeafNode(tag="code", value="<script>alert('x')</script>")
+        self.assertEqual(
+            "<code>&lt;script&gt;alert('x')&lt;/script&gt;</code>", node.to_html()
+        )
+
 
 class TestParentNode(unittest.TestCase):
     def test_to_html_with_one_child(self):
@@ -124,6 +158,56 @@ class TestParentNode(unittest.TestCase):
             node.to_html(),
         )
 
+    def test_to_html_with_props(self):
+        node = ParentNode(
+            tag="div",
+            children=[LeafNode(tag=None, value="text")],
+            props={"class": "note"},
+        )
+        self.assertEqual('<div class="note">text</div>', node.to_html())
+
+    def test_to_html_nested_child_without_children_raises_value_error(self):
+        node = ParentNode(tag="p", children=[ParentNode(tag="b", children=[])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_to_html_deep_nesting_does_not_recurse(self):
+        node = LeafNode(tag=None, value="deep")
+        for _ in range(5000):
+            node = ParentNode(tag="blockquote", children=[node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<blockquote>" * 5000 + "deep"))
+        self.assertTrue(html.endswith("</blockquote>" * 5000))
+
+    def test_write_html_writes_to_sink(self):
+        node = ParentNode(
+            tag="p",
+            children=[
+                LeafNode(tag="b", value="Bold text"),
+                LeafNode(tag=None, value="Normal text"),
+            ],
+        )
+        sink = io.StringIO()
+        write_html(node, sink)
+        self.assertEqual(node.to_html(), sink.getvalue())
+
+    def test_to_html_chunks_with_generator_children(self):
+        node = ParentNode(
+            tag="ul",
+            children=(
+                ParentNode(tag="li", children=[LeafNode(tag=None, value=str(i))])
+                for i in range(3)
+            ),
+        )
+        self.assertEqual(
+            "<ul>|<li>|0|</li>|<li>|1|</li>|<li>|2|</li>|</ul>",
+            "|".join(node.to_html_chunks()),
+        )
+
+    def test_leaf_to_html_chunks(self):
+        node = LeafNode(tag="b", value="Bold text")
+        self.assertEqual(["<b>Bold text</b>"], list(node.to_html_chunks()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,143 @@
+import email.utils
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from httputil import (
+    PageCache,
+    accepts_gzip,
+    choose_encoding,
+    etag_for,
+    is_not_modified,
+    parse_range,
+)
+
+MTIME = 1_700_000_000
+
+
+class TestValidators(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write("page.html", "<p>hi</p>")
+        os.utime(self.path, (MTIME, MTIME))
+        self.stat = os.stat(self.path)
+        self.etag = etag_for(self.stat)
+
+    def test_etag(self):
+        mtime_ns = f"{MTIME * 10**9:x}"
+        self.assertEqual(f'"{mtime_ns}-9"', self.etag)
+        self.assertEqual(f'"{mtime_ns}-9-gz"', etag_for(self.stat, gzip=True))
+
+    def test_etag_changes_with_the_file(self):
+        self.write(self.path, "<p>hello</p>")
+        os.utime(self.path, (MTIME + 1, MTIME + 1))
+        self.assertNotEqual(self.etag, etag_for(os.stat(self.path)))
+
+    def test_if_none_match(self):
+        self.assertTrue(is_not_modified(self.etag, None, self.etag, MTIME))
+        self.assertTrue(is_not_modified(f'"x", {self.etag}', None, self.etag, MTIME))
+        self.assertTrue(is_not_modified("*", None, self.etag, MTIME))
+        self.assertFalse(is_not_modified('"x"', None, self.etag, MTIME))
+        gz_etag = etag_for(self.stat, gzip=True)
+        self.assertFalse(is_not_modified(gz_etag, None, self.etag, MTIME))
+
+    def test_if_modified_since(self):
+        date = email.utils.formatdate(MTIME, usegmt=True)
+        earlier = email.utils.formatdate(MTIME - 1, usegmt=True)
+        self.assertTrue(is_not_modified(None, date, self.etag, MTIME + 0.5))
+        self.assertFalse(is_not_modified(None, earlier, self.etag, MTIME))
+        self.assertFalse(is_not_modified(None, "not a date", self.etag, MTIME))
+        self.assertFalse(is_not_modified(None, None, self.etag, MTIME))
+
+    def test_if_none_match_wins_over_if_modified_since(self):
+        date = email.utils.formatdate(MTIME, usegmt=True)
+        self.assertFalse(is_not_modified('"x"', date, self.etag, MTIME))
+
+
+class TestPageCache(TempDirTestCase):
+    def test_edited_file_is_read_again(self):
+        cache = PageCache()
+        path = self.write("a.html", "old")
+        os.utime(path, (MTIME, MTIME))
+        self.assertEqual(b"old", cache.get(path, os.stat(path)))
+        self.write(path, "new")
+        os.utime(path, (MTIME, MTIME))
+        # Same mtime and size: the cached body is still served.
+        self.assertEqual(b"old", cache.get(path, os.stat(path)))
+        os.utime(path, (MTIME + 1, MTIME + 1))
+        self.assertEqual(b"new", cache.get(path, os.stat(path)))
+
+    def test_bounds(self):
+        cache = PageCache(max_bytes=10, max_entry_bytes=6)
+        big = self.write("big", "x" * 7)
+        self.assertIsNone(cache.get(big, os.stat(big)))
+        paths = [self.write(name, "x" * 6) for name in ["a", "b"]]
+        for path in paths:
+            cache.get(path, os.stat(path))
+        self.assertEqual(6, cache._size)
+        self.assertEqual([paths[1]], [key[0] for key in cache._entries])
+
+
+class TestParseRange(unittest.TestCase):
+    def test_no_range(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range("items=0-5", 100))
+
+    def test_single_ranges(self):
+        self.assertEqual((0, 9), parse_range("bytes=0-9", 100))
+        self.assertEqual((90, 99), parse_range("bytes=90-", 100))
+        self.assertEqual((90, 99), parse_range("bytes=90-200", 100))
+        self.assertEqual((5, 5), parse_range("bytes= 5 - 5", 100))
+
+    def test_suffix_ranges(self):
+        self.assertEqual((90, 99), parse_range("bytes=-10", 100))
+        self.assertEqual((0, 99), parse_range("bytes=-500", 100))
+        self.assertEqual((0, 0), parse_range("bytes=-1", 1))
+
+    def test_multiple_ranges_get_the_whole_body(self):
+        self.assertIsNone(parse_range("bytes=0-9,20-29", 100))
+        self.assertIsNone(parse_range("bytes=-5, 0-1", 100))
+
+    def test_invalid_ranges_get_the_whole_body(self):
+        for header in [
+            "bytes=",
+            "bytes=-",
+            "bytes=5",
+            "bytes=a-b",
+            "bytes=--5",
+            "bytes=+1-2",
+            "bytes=9-3",
+        ]:
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 100))
+
+    def test_unsatisfiable_ranges(self):
+        self.assertIs(False, parse_range("bytes=100-", 100))
+        self.assertIs(False, parse_range("bytes=100-200", 100))
+        self.assertIs(False, parse_range("bytes=-0", 100))
+        self.assertIs(False, parse_range("bytes=0-", 0))
+        self.assertIs(False, parse_range("bytes=-5", 0))
+
+
+class TestEncoding(unittest.TestCase):
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip"))
+        self.assertTrue(accepts_gzip("br, gzip;q=0.5"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("gzip; q=oops"))
+        self.assertFalse(accepts_gzip("x-gzip, deflate"))
+        self.assertFalse(accepts_gzip(""))
+        self.assertFalse(accepts_gzip(None))
+
+    def test_choose_encoding(self):
+        self.assertEqual("gzip", choose_encoding("gzip", 10, 10))
+        self.assertEqual("gzip", choose_encoding("gzip", 10, 20))
+        self.assertIsNone(choose_encoding("gzip", 10, None))
+        self.assertIsNone(choose_encoding("deflate", 10, 20))
+
+    def test_stale_sibling_is_not_used(self):
+        self.assertIsNone(choose_encoding("gzip", 20, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from inline_cache import InlineMemo, LRUCache
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_html_node, use_inline_memo
+from textnode import TextNode, text_type_text
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual({"hits": 1, "misses": 1}, _counts(cache))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2, len(cache))
+
+    def test_maxsize_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            LRUCache(maxsize=0)
+
+
+class TestInlineMemo(unittest.TestCase):
+    text = "A **nav** line with *a [link](https://www.boot.dev)*"
+
+    def test_text_to_textnodes_matches_uncached(self):
+        memo = InlineMemo()
+        expected = text_to_textnodes(self.text)
+        self.assertEqual(expected, memo.text_to_textnodes(self.text))
+        self.assertEqual(expected, memo.text_to_textnodes(self.text))
+        self.assertEqual(1, memo.textnodes.hits)
+        self.assertEqual(1, memo.textnodes.misses)
+
+    def test_deeply_nested(self):
+        memo = InlineMemo()
+        text = "*a " * 2000 + "b*" * 2000
+        memo.text_to_textnodes(text)
+        self.assertEqual(text_to_textnodes(text), memo.text_to_textnodes(text))
+
+    def test_mutating_result_does_not_corrupt_cache(self):
+        memo = InlineMemo()
+        nodes = memo.text_to_textnodes(self.text)
+        nodes[0].text = "changed"
+        nodes.append(TextNode("extra", text_type_text))
+        expected = text_to_textnodes(self.text)
+        self.assertEqual(expected, memo.text_to_textnodes(self.text))
+
+    def test_use_inline_memo_in_block_rendering(self):
+        memo = InlineMemo(maxsize=8)
+        markdown = f"{self.text}\n\n{self.text}"
+        expected = markdown_to_html_node(markdown).to_html()
+        use_inline_memo(memo)
+        try:
+            self.assertEqual(expected, markdown_to_html_node(markdown).to_html())
+        finally:
+            use_inline_memo(None)
+        self.assertEqual(1, memo.textnodes.hits)
+
+
+def _counts(cache):
+    stats = cache.stats()
+    return {"hits": stats["hits"], "misses": stats["misses"]}
+
+
+if __name__ == "__main__":
+    unittest.main()
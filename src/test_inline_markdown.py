@@ -1,8 +1,11 @@
+import time
 import unittest
 
 from inline_markdown import (
     extract_markdown_images,
+    extract_markdown_images_and_links,
     extract_markdown_links,
+    extract_references_batch,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -162,6 +165,117 @@ class TestInlineMarkdown(unittest.TestCase):
             text_to_textnodes(text),
         )
 
+    def test_text_to_textnodes_single_pass_matches_chained(self):
+        texts = [
+            "This is **text** with an *italic* word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+            "**bold***italic*`code`",
+            "![a](b)[c](d) plain [e](f)",
+            "[note] see ![image](https://www.boot.dev/img.png)",
+            "",
+            "no markdown at all",
+        ]
+        for text in texts:
+            self.assertEqual(
+                text_to_textnodes(text, single_pass=False),
+                text_to_textnodes(text, single_pass=True),
+            )
+
+    def test_text_to_textnodes_unmatched_delimiters_are_literal(self):
+        for text in ["This is `unclosed code", "a * b * c", "**bold", "[not a link"]:
+            self.assertEqual(
+                [TextNode(text, text_type_text)], text_to_textnodes(text)
+            )
+
+    def test_text_to_textnodes_stray_delimiter_next_to_emphasis(self):
+        self.assertEqual(
+            [
+                TextNode("*", text_type_text),
+                TextNode("foo", text_type_bold),
+                TextNode(" and 2 * 3", text_type_text),
+            ],
+            text_to_textnodes("***foo** and 2 * 3"),
+        )
+
+    def test_text_to_textnodes_nested_emphasis(self):
+        self.assertEqual(
+            [
+                TextNode(
+                    "",
+                    text_type_bold,
+                    children=[
+                        TextNode("bold with ", text_type_text),
+                        TextNode("italic", text_type_italic),
+                        TextNode(" inside", text_type_text),
+                    ],
+                )
+            ],
+            text_to_textnodes("**bold with *italic* inside**"),
+        )
+
+    def test_text_to_textnodes_bold_and_italic_in_one_run(self):
+        self.assertEqual(
+            [
+                TextNode(
+                    "",
+                    text_type_italic,
+                    children=[TextNode("foo", text_type_bold)],
+                )
+            ],
+            text_to_textnodes("***foo***"),
+        )
+
+    def test_text_to_textnodes_no_emphasis_inside_code_or_links(self):
+        self.assertEqual(
+            [
+                TextNode("*a*", text_type_code),
+                TextNode(" ", text_type_text),
+                TextNode("*b*", text_type_link, "https://x.dev/*c*"),
+            ],
+            text_to_textnodes("`*a*` [*b*](https://x.dev/*c*)"),
+        )
+
+    def test_text_to_textnodes_is_linear(self):
+        # Thousands of openers that never close must not be searched again
+        # for every later delimiter. Quadratic work would take 16 times as
+        # long for 4 times the input.
+        def best_time(n):
+            text = "*a " * n + "b*" * n + "`x" * n
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                nodes = text_to_textnodes(text)
+                best = min(best, time.perf_counter() - start)
+            code = [node for node in nodes if node.text_type == text_type_code]
+            self.assertEqual(n // 2, len(code))
+            return best
+
+        self.assertLess(best_time(16000), 8 * best_time(4000))
+
+    def test_text_to_textnodes_deep_nesting(self):
+        for text, depth in [
+            ("**a " * 1200 + "b**" * 1200, 1200),
+            ("*a **b " * 1500 + "c*" * 1500, 1500),
+            ("*" * 3000 + "a" + "*" * 3000, 1500),
+        ]:
+            nodes = text_to_textnodes(text)
+            levels = 0
+            while nodes:
+                levels += 1
+                nested = [node for node in nodes if node.children]
+                for node in nested:
+                    # The text is only kept at the bottom, not copied up.
+                    self.assertEqual("", node.text)
+                nodes = nested[0].children if nested else None
+            self.assertEqual(depth, levels)
+            self.assertEqual(text_to_textnodes(text), text_to_textnodes(text))
+
+    def test_text_to_textnodes_without_markup(self):
+        self.assertEqual([], text_to_textnodes(""))
+        self.assertEqual(
+            [TextNode("plain (text)!", text_type_text)],
+            text_to_textnodes("plain (text)!"),
+        )
+
     def test_extract_markdown_images(self):
         text = "This is text with an ![image](https://storage.googleapis.com/qvault-webapp-dynamic-assets/course_assets/zjjcJKZ.png) and ![another](https://storage.googleapis.com/qvault-webapp-dynamic-assets/course_assets/dfsdkjfd.png)"
 
@@ -189,6 +303,53 @@ class TestInlineMarkdown(unittest.TestCase):
             extract_markdown_links(text),
         )
 
+    def test_extract_markdown_images_and_links(self):
+        text = "A [link](https://www.example.com), an ![image](https://www.example.com/img.png) and [another](https://www.example.com/another)"
+        self.assertEqual(
+            [
+                (text_type_link, "link", "https://www.example.com"),
+                (text_type_image, "image", "https://www.example.com/img.png"),
+                (text_type_link, "another", "https://www.example.com/another"),
+            ],
+            extract_markdown_images_and_links(text),
+        )
+
+    def test_split_nodes_image_same_image_twice(self):
+        node = TextNode("![a](b) and ![a](b)", text_type_text)
+        self.assertEqual(
+            [
+                TextNode("a", text_type_image, "b"),
+                TextNode(" and ", text_type_text),
+                TextNode("a", text_type_image, "b"),
+            ],
+            split_nodes_image([node]),
+        )
+
+    def test_extract_references_batch(self):
+        nodes = [
+            TextNode("See [docs](https://www.example.com/docs) and", text_type_text),
+            TextNode("[not a link](x)", text_type_code),
+            TextNode("logo", text_type_image, "https://www.example.com/logo.png"),
+            TextNode("text [split across", text_type_text),
+            TextNode("nodes](y) ![pic](https://www.example.com/pic.png)", text_type_text),
+        ]
+        self.assertEqual(
+            [
+                (text_type_link, "docs", "https://www.example.com/docs", 0, 4),
+                (text_type_image, "logo", "https://www.example.com/logo.png", 2, 0),
+                (text_type_image, "pic", "https://www.example.com/pic.png", 4, 10),
+            ],
+            extract_references_batch(nodes),
+        )
+
+    def test_extract_references_batch_matches_per_node_extraction(self):
+        text = "A [link](https://www.example.com), an ![image](https://www.example.com/img.png)"
+        refs = extract_references_batch(text_to_textnodes(text))
+        self.assertEqual(
+            extract_markdown_images_and_links(text),
+            [(ref.text_type, ref.text, ref.url) for ref in refs],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
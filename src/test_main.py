@@ -0,0 +1,23 @@
+import unittest
+
+from main import read_batch_pairs
+
+
+class TestReadBatchPairs(unittest.TestCase):
+    def test_pairs(self):
+        lines = ["content/a.md\tpublic/a.html\n", "\n", "my notes.md\tout/my notes.html"]
+        self.assertEqual(
+            [
+                ("content/a.md", "public/a.html"),
+                ("my notes.md", "out/my notes.html"),
+            ],
+            read_batch_pairs(lines),
+        )
+
+    def test_missing_output(self):
+        with self.assertRaises(ValueError):
+            read_batch_pairs(["content/a.md\tpublic/a.html\n", "content/b.md\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,21 @@
+import io
+import os
+import tempfile
 import unittest
-from markdown_blocks import markdown_to_blocks
+from markdown_blocks import (
+    BlockType,
+    block_to_block_type,
+    extract_title,
+    iter_markdown_blocks,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_html_chunks,
+    markdown_to_html_node,
+    parse_block,
+    parse_markdown,
+    parsed_to_html,
+)
+from textnode import TextNode, text_type_italic, text_type_text
 
 
 class TestMarkdownBlocks(unittest.TestCase):
@@ -68,6 +84,245 @@ This is the same paragraph on a new line""",
             markdown_to_blocks(text),
         )
 
+    def test_iter_markdown_blocks_matches_markdown_to_blocks(self):
+        text = """     This is **bolded** paragraph
+
+
+
+This is another paragraph with *italic* text and `code` here
+This is the same paragraph on a new line
+
+        * This is a list
+* with items
+"""
+        self.assertEqual(
+            markdown_to_blocks(text), list(iter_markdown_blocks(io.StringIO(text)))
+        )
+
+    def test_iter_markdown_blocks_from_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# Title\n\nFirst paragraph\n\n\n\nSecond paragraph\n")
+            self.assertEqual(
+                ["# Title", "First paragraph", "Second paragraph"],
+                list(iter_markdown_blocks(path)),
+            )
+
+    def test_iter_markdown_blocks_is_lazy(self):
+        blocks = iter_markdown_blocks(iter(["one\n", "\n", "two\n"]))
+        self.assertEqual("one", next(blocks))
+        self.assertEqual("two", next(blocks))
+
+    def test_markdown_to_blocks_keeps_fenced_code_together(self):
+        text = """Some text before
+```python
+def f():
+
+    return 1
+
+
+```
+After the code"""
+        expected = [
+            "Some text before",
+            "```python\ndef f():\n\n    return 1\n\n\n```",
+            "After the code",
+        ]
+        self.assertEqual(expected, markdown_to_blocks(text))
+        self.assertEqual(expected, list(iter_markdown_blocks(io.StringIO(text))))
+
+    def test_markdown_to_blocks_inline_triple_backticks_are_not_a_fence(self):
+        text = "```x``` is inline\n\nnext paragraph"
+        self.assertEqual(
+            ["```x``` is inline", "next paragraph"], markdown_to_blocks(text)
+        )
+
+    def test_markdown_to_blocks_longer_fence_needs_a_long_enough_close(self):
+        text = "````md\n```\n\ninner\n```\n````\n\nAfter"
+        expected = ["````md\n```\n\ninner\n```\n````", "After"]
+        self.assertEqual(expected, markdown_to_blocks(text))
+        self.assertEqual(expected, list(iter_markdown_blocks(io.StringIO(text))))
+
+
+class TestBlockToBlockType(unittest.TestCase):
+    def test_heading(self):
+        self.assertEqual(BlockType.HEADING, block_to_block_type("# heading"))
+        self.assertEqual(BlockType.HEADING, block_to_block_type("###### heading"))
+
+    def test_not_heading(self):
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("####### heading"))
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("#heading"))
+
+    def test_code(self):
+        self.assertEqual(BlockType.CODE, block_to_block_type("```\ncode\n```"))
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("```\ncode"))
+        self.assertEqual(BlockType.CODE, block_to_block_type("````\ncode\n`````"))
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("````\ncode\n```"))
+
+    def test_quote(self):
+        self.assertEqual(BlockType.QUOTE, block_to_block_type("> quote\n> more"))
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("> quote\nmore"))
+
+    def test_unordered_list(self):
+        self.assertEqual(
+            BlockType.UNORDERED_LIST, block_to_block_type("* item\n- another item")
+        )
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("* item\n*not"))
+
+    def test_ordered_list(self):
+        self.assertEqual(
+            BlockType.ORDERED_LIST, block_to_block_type("1. one\n2. two\n3. three")
+        )
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("1. one\n3. three"))
+
+    def test_paragraph(self):
+        self.assertEqual(BlockType.PARAGRAPH, block_to_block_type("Just text"))
+
+
+class TestMarkdownToHTMLNode(unittest.TestCase):
+    def test_paragraphs(self):
+        md = """This is **bolded** paragraph
+text in a p
+tag here
+
+This is another paragraph with *italic* text and `code` here"""
+        self.assertEqual(
+            "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p>"
+            "<p>This is another paragraph with <i>italic</i> text and "
+            "<code>code</code> here</p></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_headings(self):
+        md = "# this is an h1\n\nthis is paragraph text\n\n## this is an h2"
+        self.assertEqual(
+            "<div><h1>this is an h1</h1><p>this is paragraph text</p>"
+            "<h2>this is an h2</h2></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_lists(self):
+        md = """- This is a list
+- with items
+- and *more* items
+
+1. This is an `ordered` list
+2. with items
+3. and more items"""
+        self.assertEqual(
+            "<div><ul><li>This is a list</li><li>with items</li>"
+            "<li>and <i>more</i> items</li></ul>"
+            "<ol><li>This is an <code>ordered</code> list</li><li>with items</li>"
+            "<li>and more items</li></ol></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_blockquote(self):
+        md = "> This is a\n> blockquote block\n\nthis is paragraph text"
+        self.assertEqual(
+            "<div><blockquote>This is a blockquote block</blockquote>"
+            "<p>this is paragraph text</p></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_code_is_not_parsed_inline(self):
+        md = "```python\nx = a * b\n**not bold**\n```"
+        self.assertEqual(
+            "<div><pre><code>x = a * b\n**not bold**\n</code></pre></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_fenced_code_with_blank_lines_skips_inline_parsing(self):
+        md = "```\nresult = a * b\n\nprint(`result`)\n```\n\nAfter *that*"
+        self.assertEqual(
+            "<div><pre><code>result = a * b\n\nprint(`result`)\n</code></pre>"
+            "<p>After <i>that</i></p></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_longer_fence_keeps_shorter_fences_in_the_code(self):
+        md = "````\n```py\nx\n```\n````"
+        self.assertEqual(
+            "<div><pre><code>```py\nx\n```\n</code></pre></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(), parsed_to_html(parse_markdown(md))
+        )
+
+    def test_text_code_and_urls_are_escaped(self):
+        md = 'Use <b> & [x](/a?b=1&c="2")\n\n```\nif a < b:\n```'
+        self.assertEqual(
+            '<div><p>Use &lt;b&gt; &amp; <a href="/a?b=1&amp;c=&quot;2&quot;">x</a>'
+            "</p><pre><code>if a &lt; b:\n</code></pre></div>",
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_deeply_nested_emphasis(self):
+        md = "**a " * 1200 + "b**" * 1200
+        html = markdown_to_html(md)
+        self.assertTrue(html.startswith("<div><p>" + "<b>a " * 1200 + "b</b>"))
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+
+    def test_empty_document(self):
+        for md in ["", "  \n\n \t\n"]:
+            with self.subTest(md=md):
+                self.assertEqual("<div></div>", markdown_to_html_node(md).to_html())
+                self.assertEqual("<div></div>", markdown_to_html(md))
+
+
+class TestParsedBlocks(unittest.TestCase):
+    def test_parse_block(self):
+        parsed = parse_block("## A *b*")
+        self.assertEqual(BlockType.HEADING, parsed.block_type)
+        self.assertEqual(2, parsed.level)
+        self.assertEqual(
+            [[TextNode("A ", text_type_text), TextNode("b", text_type_italic)]],
+            parsed.segments,
+        )
+        self.assertEqual(3, len(parse_block("1. a\n2. b\n3. c").segments))
+
+    def test_parsed_to_html_matches_markdown_to_html_node(self):
+        md = (
+            "# T\n\np **b** [l](u)\n\n- a\n- \n\n1. x\n2. `y`\n\n"
+            "> q\n> r\n\n```\nc < d\n```"
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(), parsed_to_html(parse_markdown(md))
+        )
+
+
+class TestExtractTitle(unittest.TestCase):
+    def test_first_h1(self):
+        md = "Intro\n\n## Sub\n\n#  Hello  \n\n# Second"
+        self.assertEqual("Hello", extract_title(md))
+
+    def test_no_h1(self):
+        self.assertIsNone(extract_title("```\n# comment\n```\n\n## Sub"))
+
+
+class TestMarkdownToHTMLChunks(unittest.TestCase):
+    def test_chunks_join_to_same_html(self):
+        md = "# Title\n\nSome *text*\n\n- one\n- two\n\n```\ncode\n\nmore\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "".join(markdown_to_html_chunks(io.StringIO(md))),
+        )
+
+    def test_blocks_are_read_lazily(self):
+        read = []
+
+        def lines():
+            for line in ["first\n", "\n", "second\n"]:
+                read.append(line)
+                yield line
+
+        chunks = markdown_to_html_chunks(lines())
+        self.assertEqual("<div>", next(chunks))
+        self.assertEqual("<p>", next(chunks))
+        self.assertEqual(["first\n", "\n"], read)
+
 
 if __name__ == "__main__":
     unittest.main()
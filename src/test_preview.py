@@ -0,0 +1,130 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from fixtures import TempDirTestCase
+from preview import PreviewServer, RenderedPageCache
+
+
+class TestRenderedPageCache(unittest.TestCase):
+    def test_source_change_invalidates(self):
+        cache = RenderedPageCache()
+        cache.put("a.md", (1, 10), b"<p>a</p>")
+        self.assertEqual(b"<p>a</p>", cache.get("a.md", (1, 10)))
+        self.assertIsNone(cache.get("a.md", (2, 10)))
+        # The stale entry is gone, not just skipped.
+        self.assertIsNone(cache.get("a.md", (1, 10)))
+        self.assertEqual(0, cache._size)
+
+    def test_least_recently_used_dropped(self):
+        cache = RenderedPageCache(max_bytes=10)
+        cache.put("a.md", (1, 1), b"aaaa")
+        cache.put("b.md", (1, 1), b"bbbb")
+        cache.get("a.md", (1, 1))
+        cache.put("c.md", (1, 1), b"cccc")
+        self.assertIsNone(cache.get("b.md", (1, 1)))
+        self.assertEqual(b"aaaa", cache.get("a.md", (1, 1)))
+        self.assertEqual(b"cccc", cache.get("c.md", (1, 1)))
+        cache.put("d.md", (1, 1), b"d" * 11)
+        self.assertIsNone(cache.get("d.md", (1, 1)))
+        self.assertEqual(8, cache._size)
+
+
+class TestPreviewServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write("content/index.md", "# Home\n\nSome **text**")
+        self.write("content/style.css", "p {}")
+        self.write("secret.txt", "not served")
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        self.server = PreviewServer(self.content, executor=executor)
+
+    def respond(self, target, headers=None):
+        return asyncio.run(self.server._respond("GET", target, headers or {}))
+
+    def test_translate_path(self):
+        self.assertEqual(self.page, self.server._translate_path("/./index.md"))
+        for url_path in ("/../secret.txt", "/%2e%2e/secret.txt", "/a/%2E%2E/../x"):
+            self.assertIsNone(self.server._translate_path(url_path), url_path)
+        with self.assertRaises(ValueError):
+            self.server._translate_path("/%00")
+
+    def test_path_outside_directory_not_found(self):
+        status, _, _ = self.respond("/%2e%2e/secret.txt")
+        self.assertEqual(HTTPStatus.NOT_FOUND, status)
+
+    def test_nul_byte_bad_request(self):
+        for target in ("/%00", "/index.md%00", "/%00/"):
+            status, _, _ = self.respond(target)
+            self.assertEqual(HTTPStatus.BAD_REQUEST, status, target)
+
+    def test_renders_markdown_and_serves_other_files(self):
+        status, headers, body = self.respond("/")
+        self.assertEqual(HTTPStatus.OK, status)
+        self.assertIn(("Content-Type", "text/html; charset=utf-8"), headers)
+        self.assertIn(b"<b>text</b>", body)
+        status, headers, body = self.respond("/style.css")
+        self.assertEqual((HTTPStatus.OK, b"p {}"), (status, body))
+        etag = dict(headers)["ETag"]
+        status, _, _ = self.respond("/style.css", {"if-none-match": etag})
+        self.assertEqual(HTTPStatus.NOT_MODIFIED, status)
+
+    def test_head_not_modified(self):
+        async def request(head):
+            server = await asyncio.start_server(self.server._handle, "127.0.0.1", 0)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(head.encode("latin-1"))
+                response = await reader.read()
+                writer.close()
+                return response
+
+        _, headers, _ = self.respond("/style.css")
+        etag = dict(headers)["ETag"]
+        response = asyncio.run(
+            request(
+                f"HEAD /style.css HTTP/1.1\r\nIf-None-Match: {etag}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+        )
+        self.assertTrue(response.startswith(b"HTTP/1.1 304 Not Modified\r\n"))
+        self.assertNotIn(b"Content-Length", response)
+        self.assertTrue(response.endswith(b"\r\n\r\n"))
+        response = asyncio.run(
+            request("HEAD /style.css HTTP/1.1\r\nConnection: close\r\n\r\n")
+        )
+        self.assertIn(b"\r\nContent-Length: 4\r\n", response)
+        self.assertTrue(response.endswith(b"\r\n\r\n"))
+
+    def test_concurrent_requests_render_once(self):
+        stat = os.stat(self.page)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        async def render_twice():
+            return await asyncio.gather(
+                self.server.render(self.page, stat_key),
+                self.server.render(self.page, stat_key),
+            )
+
+        first, second = asyncio.run(render_twice())
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.server.renders)
+        self.assertEqual({}, self.server._pending)
+        asyncio.run(self.server.render(self.page, stat_key))
+        self.assertEqual(1, self.server.renders)
+
+    def test_changed_source_rendered_again(self):
+        self.respond("/index.md")
+        self.write(self.page, "# Home\n\nOther *text*")
+        os.utime(self.page, ns=(1, 1))
+        _, _, body = self.respond("/index.md")
+        self.assertIn(b"<i>text</i>", body)
+        self.assertEqual(2, self.server.renders)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import unittest
+
+import inline_markdown
+import markdown_blocks
+import profiling
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+
+
+class TestProfiler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/a.md", "Page **a**")
+        self.write("content/b.md", "# B\n\nPage *b*")
+
+    def test_profiles_every_page(self):
+        profiler = profiling.Profiler()
+        generate_pages_recursive(self.content, self.dest, workers=1, profiler=profiler)
+        self.assertEqual(
+            ["a.md", "b.md"],
+            sorted(os.path.basename(doc.path) for doc in profiler.documents),
+        )
+        doc = min(profiler.documents, key=lambda doc: doc.path)
+        self.assertEqual(
+            {"blocks": 1, "text_nodes": 2, "html_nodes": 2, "output_bytes": 31},
+            doc.counts,
+        )
+        self.assertEqual(
+            {
+                "markdown_to_blocks",
+                "text_to_textnodes",
+                "text_node_to_html_node",
+                "to_html",
+            },
+            set(doc.stages),
+        )
+
+    def test_profiles_ast_cache_builds(self):
+        ast_dir = os.path.join(self.tmp.name, "ast")
+        for stage in ("ast_cache store", "ast_cache load"):
+            profiler = profiling.Profiler()
+            generate_pages_recursive(
+                self.content,
+                self.dest,
+                workers=1,
+                profiler=profiler,
+                ast_cache_dir=ast_dir,
+            )
+            doc = min(profiler.documents, key=lambda doc: doc.path)
+            self.assertEqual(1, doc.counts["blocks"])
+            self.assertIn(stage, doc.stages)
+            if stage == "ast_cache store":
+                self.assertIn("markdown_to_blocks", doc.stages)
+        # A hit skips parsing altogether.
+        self.assertNotIn("markdown_to_blocks", doc.stages)
+        self.assertNotIn("text_to_textnodes", doc.stages)
+
+    def test_profile_passes(self):
+        self.write("content/c.md", "Price is 2 * 3, `x` and ok **x *y* z**")
+        generate_pages_recursive(self.content, self.dest, workers=1)
+        plain = [self.read(name) for name in ("a.html", "b.html", "c.html")]
+        profiler = profiling.Profiler()
+        generate_pages_recursive(
+            self.content, self.dest, workers=1, profiler=profiler, profile_passes=True
+        )
+        # The same scanner runs, only timed in more detail.
+        self.assertEqual(plain, [self.read(n) for n in ("a.html", "b.html", "c.html")])
+        self.assertIn("<b>x <i>y</i> z</b>", plain[2])
+        doc = max(profiler.documents, key=lambda doc: doc.path)
+        for stage in (
+            "scan_inline emphasis",
+            "scan_inline code spans",
+            "scan_inline finish",
+        ):
+            self.assertIn(stage, doc.stages)
+        self.assertLessEqual(
+            doc.stages["scan_inline finish"], doc.stages["text_to_textnodes"]
+        )
+
+    def test_install_none_unwraps_scan_helpers(self):
+        before = inline_markdown._close_emphasis
+        profiling.install(profiling.Profiler(), passes=True)
+        self.assertIsNot(before, inline_markdown._close_emphasis)
+        profiling.install(None)
+        self.assertIs(before, inline_markdown._close_emphasis)
+
+    def test_install_none_restores_inline_functions(self):
+        before = markdown_blocks.inline_functions()
+        profiling.install(profiling.Profiler())
+        self.assertNotEqual(before, markdown_blocks.inline_functions())
+        profiling.install(None)
+        self.assertEqual(before, markdown_blocks.inline_functions())
+        self.assertIsNone(profiling.active())
+
+    def test_report_and_chrome_trace(self):
+        profiler = profiling.Profiler()
+        generate_pages_recursive(self.content, self.dest, workers=1, profiler=profiler)
+        report = profiler.report(top=1)
+        self.assertIn("2 pages", report)
+        self.assertIn("Slowest 1 pages:", report)
+        events = profiler.chrome_trace()["traceEvents"]
+        pages = [event for event in events if event["cat"] == "page"]
+        self.assertEqual(2, len(pages))
+        self.assertEqual({"X"}, {event["ph"] for event in events})
+        self.assertIn("output_bytes", pages[0]["args"])
+        doc = profiler.documents[0]
+        at = events.index(next(event for event in pages if event["name"] == doc.path))
+        page, stages = events[at], events[at + 1 : at + 1 + len(doc.spans)]
+        self.assertEqual(set(doc.stages), {event["name"] for event in stages})
+        self.assertEqual({"stage"}, {event["cat"] for event in stages})
+        # Every stage call lies within its page, in order of starting.
+        starts = [event["ts"] for event in stages]
+        self.assertEqual(sorted(starts), starts)
+        for event in stages:
+            self.assertGreaterEqual(event["ts"], page["ts"])
+            self.assertLessEqual(event["ts"] + event["dur"], page["ts"] + page["dur"])
+        total = sum(e["dur"] for e in stages if e["name"] == "text_to_textnodes")
+        self.assertAlmostEqual(doc.stages["text_to_textnodes"] * 1e6, total)
+
+
+if __name__ == "__main__":
+    unittest.main()
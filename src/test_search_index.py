@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from markdown_blocks import parse_markdown
+from search_index import (
+    SearchIndex,
+    _decode_postings,
+    _encode_postings,
+    build_search_index,
+    page_text,
+    shard_name,
+    tokenize,
+)
+
+DOCS = [
+    ("/a.html", "Apples", "# Apples\n\nRed **apples** and green apples"),
+    ("/b.html", "Pears", "Pears and `apples()`\n\n```\napples\n```"),
+    ("/c.html", "Fruit", "- apples\n- pears\n\n1. [Über](https://x.dev/kiwi)"),
+]
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            ["hello", "wörld", "snake", "case", "42"],
+            tokenize("Hello, Wörld! snake_case 42"),
+        )
+
+    def test_page_text_skips_code_urls_and_markers(self):
+        md = "## Title\n\n> quoted `code`\n\n```\nblock\n```\n\n1. [text](https://url)"
+        blocks = parse_markdown(md)
+        self.assertEqual(["Title", "quoted ", "text"], list(page_text(blocks)))
+
+    def test_page_text_of_nested_emphasis(self):
+        blocks = parse_markdown("**bold `code` *italic***")
+        self.assertEqual(["bold ", " ", "italic"], list(page_text(blocks)))
+        blocks = parse_markdown("**a " * 1200 + "b**" * 1200)
+        self.assertEqual("a " * 1200 + "b" * 1200, "".join(page_text(blocks)))
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = os.path.join(self.tmp.name, "search")
+        build_search_index(DOCS, self.directory)
+        self.index = SearchIndex(self.directory)
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_postings_round_trip(self):
+        postings = [(0, 1), (3, 200), (1000, 5)]
+        self.assertEqual(postings, _decode_postings(_encode_postings(postings)))
+
+    def test_shards_by_prefix(self):
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, shard_name("ap")))
+        )
+
+    def test_lookup(self):
+        self.assertEqual([(0, 3), (2, 1)], self.index.lookup("apples"))
+        self.assertEqual([(2, 1)], self.index.lookup("über"))
+        self.assertEqual([], self.index.lookup("kiwi"))
+        self.assertEqual([], self.index.lookup("zebra"))
+
+    def test_search_ranks_and_intersects(self):
+        results = self.index.search("APPLES")
+        self.assertEqual(["/a.html", "/c.html"], [r["url"] for r in results])
+        self.assertEqual("Apples", results[0]["title"])
+        self.assertEqual(
+            ["/c.html"], [r["url"] for r in self.index.search("apples pears")]
+        )
+        self.assertEqual([], self.index.search("apples zebra"))
+        self.assertEqual([], self.index.search("  "))
+
+    def test_rebuilt_index_is_picked_up(self):
+        self.assertEqual([], self.index.search("kiwi"))
+        build_search_index([("/k.html", "Kiwi", "kiwi kiwi")], self.directory)
+        self.assertEqual(["/k.html"], [r["url"] for r in self.index.search("kiwi")])
+        self.assertEqual([], self.index.search("apples"))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, shard_name("ap")))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import functools
+import http.client
+import importlib.util
+import mmap
+import os
+import socket
+import threading
+import unittest
+from http import HTTPStatus
+from unittest import mock
+
+from fixtures import TempDirTestCase
+from httputil import PageCache
+
+# server.py lives next to src/ rather than in it.
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location(
+    "server", os.path.join(_root, "server.py")
+)
+server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(server)
+
+
+class _Handler(server.SiteRequestHandler):
+    # Nothing fits in the cache, so every file body is copied from disk.
+    page_cache = PageCache(max_entry_bytes=0)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _MarkdownHandler(_Handler):
+    render_markdown = True
+    stream_chunk_size = 16
+
+
+class TestSiteRequestHandler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.body = bytes(range(256)) * 256
+        self.write("public/data.bin", self.body)
+        self.write("public/page.md", "# Title\n\nSome **bold** text\n\n- one\n- two")
+
+    def serve(self, handler_class):
+        httpd = server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(handler_class, directory=self.dest)
+        )
+        thread = threading.Thread(target=httpd.serve_forever, args=(0.05,))
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        connection = http.client.HTTPConnection("127.0.0.1", httpd.server_port)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, connection, path, headers=None):
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+    @unittest.skipUnless(hasattr(os, "sendfile"), "needs os.sendfile")
+    def test_sendfile(self):
+        connection = self.serve(_Handler)
+        with mock.patch.object(
+            socket.socket, "sendfile", autospec=True, side_effect=socket.socket.sendfile
+        ) as sendfile:
+            response, body = self.get(connection, "/data.bin")
+        self.assertEqual(HTTPStatus.OK, response.status)
+        self.assertEqual(self.body, body)
+        sendfile.assert_called_once()
+
+    def test_mmap_without_sendfile(self):
+        connection = self.serve(_Handler)
+        with mock.patch.dict(os.__dict__), mock.patch.object(
+            mmap, "mmap", wraps=mmap.mmap
+        ) as mapped:
+            os.__dict__.pop("sendfile", None)
+            response, body = self.get(connection, "/data.bin")
+        self.assertEqual(HTTPStatus.OK, response.status)
+        self.assertEqual(self.body, body)
+        mapped.assert_called_once()
+
+    def test_ranges(self):
+        connection = self.serve(_Handler)
+        # All on one keep-alive connection, so a 206 or 416 must not leave
+        # bytes behind for the next response.
+        response, body = self.get(connection, "/data.bin", {"Range": "bytes=100-299"})
+        self.assertEqual(HTTPStatus.PARTIAL_CONTENT, response.status)
+        self.assertEqual(
+            f"bytes 100-299/{len(self.body)}", response.getheader("Content-Range")
+        )
+        self.assertEqual(self.body[100:300], body)
+        response, body = self.get(connection, "/data.bin", {"Range": "bytes=-10"})
+        self.assertEqual(self.body[-10:], body)
+        response, body = self.get(
+            connection, "/data.bin", {"Range": f"bytes={len(self.body)}-"}
+        )
+        self.assertEqual(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, response.status)
+        self.assertEqual(
+            f"bytes */{len(self.body)}", response.getheader("Content-Range")
+        )
+        self.assertEqual(b"", body)
+
+    def test_rendered_markdown_is_chunked(self):
+        connection = self.serve(_MarkdownHandler)
+        response, body = self.get(connection, "/page.md")
+        self.assertEqual(HTTPStatus.OK, response.status)
+        self.assertEqual("chunked", response.getheader("Transfer-Encoding"))
+        self.assertIsNone(response.getheader("Content-Length"))
+        html = body.decode("utf-8")
+        self.assertIn("<h1>Title</h1>", html)
+        self.assertIn("<b>bold</b>", html)
+        self.assertIn("<li>two</li>", html)
+        # The connection is still usable after the last chunk.
+        response, body = self.get(connection, "/data.bin")
+        self.assertEqual(self.body, body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from search_index import SearchIndex
+from sitebuild import build_site, copy_if_changed, load_manifest
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class TestBuildSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello *there*")
+        self.write(os.path.join(self.content, "blog", "post.md"), "No heading")
+        self.write(os.path.join(self.static, "styles.css"), "body { color: red; }")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def build(self):
+        return build_site(
+            self.content,
+            self.dest,
+            template_path=self.template,
+            static_paths=[self.static],
+            workers=1,
+        )
+
+    def test_first_build(self):
+        build = self.build()
+        self.assertEqual(["index.html", "blog/post.html"], build.built)
+        self.assertEqual(["styles.css", "images/a.png"], build.copied)
+        self.assertEqual(
+            "<title>Home</title><main><div><h1>Home</h1>"
+            "<p>Hello <i>there</i></p></div></main>",
+            self.read("index.html"),
+        )
+        self.assertIn("<title>post</title>", self.read("blog/post.html"))
+        self.assertEqual("body { color: red; }", self.read("styles.css"))
+        with open(os.path.join(self.dest, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual("index.md", manifest["pages"]["index.html"]["source"])
+        self.assertEqual(["images/a.png", "styles.css"], sorted(manifest["static"]))
+
+    def test_unchanged_sources_are_skipped(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        build = self.build()
+        self.assertEqual(["index.html"], build.built)
+        self.assertEqual(["blog/post.html"], build.skipped)
+        self.assertEqual([], build.copied)
+        self.assertEqual(["styles.css", "images/a.png"], build.unchanged)
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<body>{{ Content }}</body>")
+        build = self.build()
+        self.assertEqual(["index.html", "blog/post.html"], build.built)
+
+    def test_rebuild_all(self):
+        self.build()
+        build = build_site(self.content, self.dest, rebuild_all=True, workers=1)
+        self.assertEqual(["index.html", "blog/post.html"], build.built)
+
+    def test_keep_going_leaves_failed_page_to_the_next_build(self):
+        self.build()
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, b"\xff")
+        errors = []
+        build = build_site(
+            self.content,
+            self.dest,
+            template_path=self.template,
+            workers=1,
+            keep_going=True,
+            on_page=lambda page, error: errors.append(error),
+        )
+        self.assertEqual([], build.built)
+        self.assertEqual(["UnicodeDecodeError"], [e.error for e in errors if e])
+        self.assertIn("<title>post</title>", self.read("blog/post.html"))
+        self.write(post, "Fixed")
+        self.assertEqual(["blog/post.html"], self.build().built)
+
+    def test_removed_page_output_is_deleted(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog/post.html")))
+        manifest = load_manifest(os.path.join(self.dest, "manifest.json"))
+        self.assertEqual(["index.html"], list(manifest["pages"]))
+
+    def test_search_index_from_ast_cache(self):
+        ast_dir = os.path.join(self.tmp.name, "ast")
+        build_site(
+            self.content, self.dest, search=True, ast_cache_dir=ast_dir, workers=1
+        )
+        entries = [
+            name
+            for _, _, names in os.walk(ast_dir)
+            for name in names
+            if name.endswith(".ast")
+        ]
+        self.assertEqual(2, len(entries))
+        self.assertEqual(
+            "<div><h1>Home</h1><p>Hello <i>there</i></p></div>", self.read("index.html")
+        )
+        index = SearchIndex(os.path.join(self.dest, "search"))
+        self.assertEqual(
+            [{"url": "/index.html", "title": "Home", "score": 1.0986122886681098}],
+            index.search("hello"),
+        )
+        index.close()
+        manifest = load_manifest(os.path.join(self.dest, "manifest.json"))
+        self.assertIn("search/docs.json", manifest["search"])
+
+    def test_manifest_and_search_index_are_readable_like_the_pages(self):
+        build_site(self.content, self.dest, search=True, workers=1)
+        page_mode = os.stat(os.path.join(self.dest, "index.html")).st_mode
+        manifest = load_manifest(os.path.join(self.dest, "manifest.json"))
+        for rel_path in ["manifest.json", *manifest["search"]]:
+            mode = os.stat(os.path.join(self.dest, rel_path)).st_mode
+            self.assertEqual(oct(page_mode & 0o777), oct(mode & 0o777), rel_path)
+
+
+class TestCopyIfChanged(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = self.write("styles.css", "a")
+        self.dest = os.path.join(self.tmp.name, "out", "styles.css")
+
+    def test_copies_then_skips(self):
+        entry, copied = copy_if_changed(self.src, self.dest)
+        self.assertTrue(copied)
+        self.assertEqual(entry, copy_if_changed(self.src, self.dest, entry)[0])
+        self.assertFalse(copy_if_changed(self.src, self.dest, entry)[1])
+
+    def test_same_content_new_mtime_is_not_copied(self):
+        copy_if_changed(self.src, self.dest)
+        os.utime(self.src, ns=(0, 10**9))
+        self.assertFalse(copy_if_changed(self.src, self.dest)[1])
+        self.assertEqual(10**9, os.stat(self.dest).st_mtime_ns)
+
+    def test_changed_content_of_same_size_is_copied(self):
+        copy_if_changed(self.src, self.dest)
+        self.write(self.src, "b")
+        os.utime(self.src, ns=(0, 10**9))
+        self.assertTrue(copy_if_changed(self.src, self.dest)[1])
+        with open(self.dest) as f:
+            self.assertEqual("b", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,15 @@
 import unittest
 
-from textnode import TextNode
+from textnode import (
+    TextNode,
+    TextType,
+    text_node_to_html_node,
+    text_type_bold,
+    text_type_image,
+    text_type_italic,
+    text_type_link,
+    text_type_text,
+)
 
 
 class TestTextNode(unittest.TestCase):
@@ -14,6 +23,73 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", "bold")
         self.assertNotEqual(node, node2)
 
+    def test_eq_plain_string_and_text_type(self):
+        self.assertEqual(
+            TextNode("This is a text node", "bold"),
+            TextNode("This is a text node", TextType.BOLD),
+        )
+
+    def test_has_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            TextNode("text", text_type_text).__dict__
+
+
+class TestTextNodeToHTMLNode(unittest.TestCase):
+    def test_text(self):
+        node = text_node_to_html_node(TextNode("Normal text", text_type_text))
+        self.assertEqual("Normal text", node.to_html())
+
+    def test_bold_from_plain_string(self):
+        node = text_node_to_html_node(TextNode("Bold text", "bold"))
+        self.assertEqual("<b>Bold text</b>", node.to_html())
+
+    def test_link(self):
+        node = text_node_to_html_node(
+            TextNode("Click me!", text_type_link, "https://www.boot.dev")
+        )
+        self.assertEqual('<a href="https://www.boot.dev">Click me!</a>', node.to_html())
+
+    def test_image(self):
+        node = text_node_to_html_node(
+            TextNode("alt text", text_type_image, "https://www.boot.dev/img.png")
+        )
+        self.assertEqual(
+            '<img src="https://www.boot.dev/img.png" alt="alt text"></img>',
+            node.to_html(),
+        )
+
+    def test_nested(self):
+        node = TextNode(
+            "",
+            text_type_bold,
+            children=[
+                TextNode("bold ", text_type_text),
+                TextNode("italic", text_type_italic),
+            ],
+        )
+        self.assertNotEqual(TextNode("", text_type_bold), node)
+        self.assertEqual(
+            "<b>bold <i>italic</i></b>", text_node_to_html_node(node).to_html()
+        )
+
+    def test_deeply_nested(self):
+        def chain(depth, text):
+            node = TextNode(text, text_type_italic)
+            for i in range(depth):
+                text_type = text_type_bold if i % 2 else text_type_italic
+                node = TextNode("", text_type, children=[node])
+            return node
+
+        node = chain(3000, "x")
+        self.assertEqual(chain(3000, "x"), node)
+        self.assertNotEqual(chain(3000, "y"), node)
+        html = text_node_to_html_node(node).to_html()
+        self.assertEqual(3001 * len("<i></i>") + 1, len(html))
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(Exception):
+            text_node_to_html_node(TextNode("text", "underline"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,120 @@
+import contextlib
+import io
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from search_index import SEARCH_DIR, SearchIndex
+from sitebuild import MANIFEST_NAME
+from watch import RELOAD_STAMP, SiteWatcher
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shared = os.path.join(self.tmp.name, "shared.html")
+        self.write(os.path.join(self.content, "a.md"), "Page *a*")
+        self.write(os.path.join(self.content, "sub", "b.md"), "Page **b**")
+        self.write(self.shared, "shared")
+        self.watcher = SiteWatcher(
+            self.content, self.dest, shared_dependencies=[self.shared]
+        )
+        self.watcher.build_all()
+
+    def write(self, path, text):
+        path = super().write(path, text)
+        # Make every write visible to mtime polling, however coarse.
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        return path
+
+    def test_build_all(self):
+        self.assertEqual("<div><p>Page <i>a</i></p></div>", self.read("a.html"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, RELOAD_STAMP)))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, MANIFEST_NAME)))
+
+    def test_poll_without_changes_rebuilds_nothing(self):
+        self.assertIsNone(self.watcher.poll())
+
+    def test_poll_rebuilds_only_changed_page(self):
+        self.write(os.path.join(self.content, "a.md"), "Page *a* edited")
+        self.assertEqual(["a.html"], self.watcher.poll().built)
+        self.assertEqual("<div><p>Page <i>a</i> edited</p></div>", self.read("a.html"))
+
+    def test_poll_builds_new_page_and_removes_deleted_one(self):
+        self.write(os.path.join(self.content, "c.md"), "Page c")
+        os.remove(os.path.join(self.content, "a.md"))
+        self.assertEqual(["c.html"], self.watcher.poll().built)
+        self.assertEqual("<div><p>Page c</p></div>", self.read("c.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "a.html")))
+
+    def test_poll_shared_dependency_rebuilds_every_page(self):
+        self.write(self.shared, "shared edited")
+        self.assertEqual(2, len(self.watcher.poll().built))
+
+    def test_failing_page_does_not_stop_the_others(self):
+        self.write(os.path.join(self.content, "a.md"), b"Page \xff")
+        self.write(os.path.join(self.content, "c.md"), "Page c")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            build = self.watcher.poll()
+        self.assertEqual(["c.html"], build.built)
+        self.assertIn("a.md:1:6: UnicodeDecodeError", out.getvalue())
+        # The old page stays until the source is fixed.
+        self.assertEqual("<div><p>Page <i>a</i></p></div>", self.read("a.html"))
+        self.write(os.path.join(self.content, "a.md"), "Page *a* fixed")
+        self.assertEqual(["a.html"], self.watcher.poll().built)
+
+    def test_template_and_static_files(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        static = os.path.join(self.tmp.name, "static")
+        self.write(template, "<main>{{ Content }}</main>")
+        self.write(os.path.join(static, "style.css"), "a {}")
+        watcher = SiteWatcher(
+            self.content, self.dest, template_path=template, static_paths=[static]
+        )
+        watcher.build_all()
+        page = "<div><p>Page <i>a</i></p></div>"
+        self.assertEqual(f"<main>{page}</main>", self.read("a.html"))
+        self.assertEqual("a {}", self.read("style.css"))
+
+        self.write(template, "<body>{{ Content }}</body>")
+        self.assertEqual(2, len(watcher.poll().built))
+        self.assertEqual(f"<body>{page}</body>", self.read("a.html"))
+
+        self.write(os.path.join(static, "style.css"), "b {}")
+        build = watcher.poll()
+        self.assertEqual(([], ["style.css"]), (build.built, build.copied))
+        self.assertEqual("b {}", self.read("style.css"))
+
+    def test_search_index_follows_edits(self):
+        watcher = SiteWatcher(self.content, self.dest, search=True)
+        watcher.build_all()
+        index = SearchIndex(os.path.join(self.dest, SEARCH_DIR))
+        self.addCleanup(index.close)
+        self.assertEqual([], index.search("kiwi"))
+        self.write(os.path.join(self.content, "a.md"), "Page about kiwi")
+        watcher.poll()
+        self.assertEqual(["/a.html"], [r["url"] for r in index.search("kiwi")])
+        os.remove(os.path.join(self.content, "a.md"))
+        watcher.poll()
+        self.assertEqual([], index.search("kiwi"))
+
+    def test_search_index_skips_failing_page(self):
+        watcher = SiteWatcher(self.content, self.dest, search=True)
+        watcher.build_all()
+        index = SearchIndex(os.path.join(self.dest, SEARCH_DIR))
+        self.addCleanup(index.close)
+        manifest = os.path.join(self.dest, MANIFEST_NAME)
+        os.utime(manifest, ns=(0, 0))
+        self.write(os.path.join(self.content, "a.md"), b"Page \xff")
+        self.write(os.path.join(self.content, "sub", "b.md"), "Page about kiwi")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            build = watcher.poll()
+        self.assertEqual(["sub/b.html"], build.built)
+        self.assertNotIn("Failed to rebuild the site", out.getvalue())
+        self.assertEqual(["/sub/b.html"], [r["url"] for r in index.search("kiwi")])
+        self.assertNotEqual(0, os.stat(manifest).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,45 +1,146 @@
 from __future__ import annotations
 
-from htmlnode import LeafNode
+from collections.abc import Iterable, Iterator
+from enum import Enum
 
-text_type_text = "text"
-text_type_bold = "bold"
-text_type_italic = "italic"
-text_type_code = "code"
-text_type_link = "link"
-text_type_image = "image"
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+
+class TextType(str, Enum):
+    """
+    Members compare and hash equal to their plain string values, so code
+    passing "bold" and code passing TextType.BOLD stay interchangeable.
+    """
+
+    TEXT = "text"
+    BOLD = "bold"
+    ITALIC = "italic"
+    CODE = "code"
+    LINK = "link"
+    IMAGE = "image"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+text_type_text = TextType.TEXT
+text_type_bold = TextType.BOLD
+text_type_italic = TextType.ITALIC
+text_type_code = TextType.CODE
+text_type_link = TextType.LINK
+text_type_image = TextType.IMAGE
 
 
 class TextNode:
-    def __init__(self, text: str, text_type: str, url: str = None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(
+        self,
+        text: str,
+        text_type: str,
+        url: str = None,
+        children: list[TextNode] = None,
+    ):
+        """
+        children is only set on bold and italic nodes whose content has
+        other markup in it; text is then empty, the text being that of the
+        children.
+        """
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
 
     def __eq__(self, other: TextNode) -> bool:
-        return (
-            self.text == other.text
-            and self.text_type == other.text_type
-            and self.url == other.url
-        )
+        # Node by node in walk_nodes order rather than through list == on
+        # the children, which would recurse once per level of nesting. As
+        # long as the child counts agree, both walks stay in step.
+        for node, other in zip(walk_nodes([self]), walk_nodes([other])):
+            if (
+                node.text != other.text
+                or node.text_type != other.text_type
+                or node.url != other.url
+            ):
+                return False
+            if node.children is None or other.children is None:
+                if node.children is not other.children:
+                    return False
+            elif len(node.children) != len(other.children):
+                return False
+        return True
 
     def __repr__(self) -> str:
+        if self.children:
+            return (
+                f"TextNode({self.text}, {self.text_type}, {self.url}, {self.children})"
+            )
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
 
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
-    if text_node.text_type == text_type_text:
-        return LeafNode(tag=None, value=text_node.text)
-    if text_node.text_type == text_type_bold:
-        return LeafNode(tag="b", value=text_node.text)
-    if text_node.text_type == text_type_italic:
-        return LeafNode(tag="i", value=text_node.text)
-    if text_node.text_type == text_type_code:
-        return LeafNode(tag="code", value=text_node.text)
-    if text_node.text_type == text_type_link:
-        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
-    if text_node.text_type == text_type_image:
-        return LeafNode(
-            tag="img", value="", props={"src": text_node.url, "alt": text_node.text}
-        )
-    raise Exception(f"Unknown node type {text_node.text_type}")
+def walk_nodes(nodes: Iterable[TextNode]) -> Iterator[TextNode]:
+    """
+    Every node in nodes and, right after each, its children the same way:
+    depth first, parents before their children. The nesting is followed
+    with an explicit stack of child iterators instead of recursion, so
+    emphasis nested thousands of levels deep can't hit the recursion
+    limit; walks that build trees keep such a stack themselves.
+    """
+    stack = [iter(nodes)]
+    while stack:
+        for node in stack[-1]:
+            yield node
+            if node.children:
+                stack.append(iter(node.children))
+                break
+        else:
+            stack.pop()
+
+
+def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+    if not text_node.children:
+        return _leaf_node(text_node)
+    # Iterative like walk_nodes, keeping the list each level goes in.
+    root = ParentNode(tag=_nested_tag(text_node), children=[])
+    stack = [(iter(text_node.children), root.children)]
+    while stack:
+        children, converted = stack[-1]
+        for child in children:
+            if child.children:
+                node = ParentNode(tag=_nested_tag(child), children=[])
+                converted.append(node)
+                stack.append((iter(child.children), node.children))
+                break
+            converted.append(_leaf_node(child))
+        else:
+            stack.pop()
+    return root
+
+
+def _leaf_node(text_node: TextNode) -> LeafNode:
+    convert = _TEXT_NODE_CONVERTERS.get(text_node.text_type)
+    if convert is None:
+        raise Exception(f"Unknown node type {text_node.text_type}")
+    return convert(text_node)
+
+
+def _nested_tag(text_node: TextNode) -> str:
+    tag = _NESTED_TAGS.get(text_node.text_type)
+    if tag is None:
+        raise Exception(f"Node type {text_node.text_type} can't have children")
+    return tag
+
+
+_NESTED_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i"}
+
+_TEXT_NODE_CONVERTERS = {
+    TextType.TEXT: lambda node: LeafNode(tag=None, value=node.text),
+    TextType.BOLD: lambda node: LeafNode(tag="b", value=node.text),
+    TextType.ITALIC: lambda node: LeafNode(tag="i", value=node.text),
+    TextType.CODE: lambda node: LeafNode(tag="code", value=node.text),
+    TextType.LINK: lambda node: LeafNode(
+        tag="a", value=node.text, props={"href": node.url}
+    ),
+    TextType.IMAGE: lambda node: LeafNode(
+        tag="img", value="", props={"src": node.url, "alt": node.text}
+    ),
+}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import time
+import traceback
+
+from batch import DocumentError, format_error
+from sitebuild import SiteBuild, build_site
+
+# Written into dest_dir after every rebuild; server.py --livereload watches
+# it to tell browsers to reload.
+RELOAD_STAMP = ".livereload"
+
+
+class SiteWatcher:
+    """
+    Keeps the converter loaded and rebuilds the site whenever a source
+    changes.
+
+    The stdlib has no inotify binding, so changes are found by polling
+    the mtime and size of every file under content_dir and static_paths,
+    the template and any shared dependencies (files every page is
+    rendered with). Every rebuild is a sitebuild.build_site run with the
+    options of the one-shot build, whose manifest limits it to the pages
+    and static files that changed; a changed shared dependency rebuilds
+    every page. A page that fails to build is reported and tried again
+    on the next rebuild, without stopping the others.
+    """
+
+    def __init__(
+        self,
+        content_dir: str,
+        dest_dir: str,
+        shared_dependencies: list[str] = None,
+        template_path: str = None,
+        static_paths: list[str] = (),
+        **options,
+    ) -> None:
+        """
+        The template and static paths are those of build_site, which is
+        passed the remaining options too.
+        """
+        self.content_dir = content_dir
+        self.dest_dir = dest_dir
+        self.shared_dependencies = list(shared_dependencies or [])
+        self.template_path = template_path
+        self.static_paths = list(static_paths)
+        self.options = options
+        self._snapshot = self._scan()
+
+    def build_all(self) -> SiteBuild | None:
+        return self._rebuild(rebuild_all=True)
+
+    def poll(self) -> SiteBuild | None:
+        """
+        Rebuild the site if anything changed since the last poll and
+        return what the build did, or None when nothing was built.
+        """
+        snapshot = self._scan()
+        changed = [p for p, stat in snapshot.items() if self._snapshot.get(p) != stat]
+        removed = [p for p in self._snapshot if p not in snapshot]
+        self._snapshot = snapshot
+        if not changed and not removed:
+            return None
+        shared = set(self.shared_dependencies)
+        return self._rebuild(rebuild_all=any(p in shared for p in changed + removed))
+
+    def run(self, interval: float = 0.5) -> None:
+        while True:
+            start = time.perf_counter()
+            build = self.poll()
+            if build is not None:
+                elapsed = time.perf_counter() - start
+                print(
+                    f"Rebuilt {len(build.built)} pages and copied"
+                    f" {len(build.copied)} static files in {elapsed:.2f}s"
+                )
+            time.sleep(interval)
+
+    def _rebuild(self, rebuild_all: bool) -> SiteBuild | None:
+        try:
+            build = build_site(
+                self.content_dir,
+                self.dest_dir,
+                template_path=self.template_path,
+                static_paths=self.static_paths,
+                rebuild_all=rebuild_all,
+                keep_going=True,
+                on_page=_report_error,
+                **self.options,
+            )
+        except Exception:
+            # Keep watching, say when the template can't be read; the next
+            # change retries the build.
+            print("Failed to rebuild the site:")
+            traceback.print_exc()
+            return None
+        self._touch_reload_stamp()
+        return build
+
+    def _touch_reload_stamp(self) -> None:
+        os.makedirs(self.dest_dir, exist_ok=True)
+        with open(os.path.join(self.dest_dir, RELOAD_STAMP), "w") as f:
+            f.write(str(time.time_ns()))
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        paths = list(self.shared_dependencies)
+        if self.template_path is not None:
+            paths.append(self.template_path)
+        for directory in [self.content_dir, *self.static_paths]:
+            if not os.path.isdir(directory):
+                paths.append(directory)
+                continue
+            for root, _, files in os.walk(directory):
+                paths.extend(os.path.join(root, name) for name in files)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+def _report_error(page: tuple[str, str], error: DocumentError | None) -> None:
+    if error is not None:
+        print(f"Failed to build {format_error(error)}")